@@ -2,7 +2,7 @@
 Health Check API Router (v0.3)
 Provides health and status endpoints
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from datetime import datetime
 from config import config
 
@@ -21,8 +21,17 @@ async def health_check():
 
 
 @router.get("/status")
-async def status():
+async def status(request: Request):
     """Detailed status endpoint"""
+    wake_word_detector = getattr(request.app.state, "wake_word_detector", None)
+    model_warmup = getattr(request.app.state, "model_warmup", None)
+    stt_service = getattr(request.app.state, "stt_service", None)
+    stt_fast_path = getattr(request.app.state, "stt_fast_path", None)
+    stt_batcher = getattr(request.app.state, "stt_batcher", None)
+    audio_preprocessor = getattr(request.app.state, "audio_preprocessor", None)
+    model_manager = getattr(request.app.state, "model_manager", None)
+    tts_engine = getattr(request.app.state, "tts_engine", None)
+    
     return {
         "status": "running",
         "service": config.get("app.name", "NuxAI"),
@@ -33,6 +42,14 @@ async def status():
             "voice_enabled": config.get("personality.voice_enabled")
         },
         "features": config.get("features", {}),
+        "audio": wake_word_detector.get_stats() if wake_word_detector else None,
+        "readiness": model_warmup.get_status() if model_warmup else None,
+        "stt": stt_service.get_stats() if stt_service else None,
+        "stt_tiers": stt_fast_path.get_stats() if stt_fast_path else None,
+        "stt_batching": stt_batcher.get_stats() if stt_batcher else None,
+        "preprocess": audio_preprocessor.get_stats() if audio_preprocessor else None,
+        "memory": model_manager.get_stats() if model_manager else None,
+        "tts": tts_engine.get_stats() if tts_engine else None,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -2,6 +2,7 @@
 WebSocket API Router
 Handles WebSocket connections from the overlay
 """
+from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from core.websocket_manager import ConnectionManager
 from utils.logger import setup_logger
@@ -11,10 +12,18 @@ router = APIRouter()
 manager = ConnectionManager()
 
 
+def _as_int(value) -> Optional[int]:
+    """A JSON integer field, or None if it is missing or not an integer"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+
 @router.websocket("/overlay")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for overlay communication"""
     await manager.connect(websocket)
+    audio_stream = getattr(websocket.app.state, "audio_stream", None)
     
     try:
         # Send welcome message
@@ -44,10 +53,41 @@ async def websocket_endpoint(websocket: WebSocket):
                     "message": "Backend is ready"
                 }, websocket)
             
+            elif message_type == "audio_subscribe":
+                if audio_stream is None:
+                    await manager.send_personal_message({
+                        "type": "error",
+                        "message": "Remote audio is disabled (tts.remote_audio.enabled)"
+                    }, websocket)
+                    continue
+                # A missing or invalid window gets the configured default
+                window = await audio_stream.subscribe(websocket, _as_int(data.get("window")))
+                await manager.send_personal_message({
+                    "type": "audio_subscribed",
+                    "format": "pcm_s16le",
+                    "channels": 1,
+                    "frame_ms": audio_stream.frame_ms,
+                    "window": window
+                }, websocket)
+            
+            elif message_type == "audio_ack":
+                seq = _as_int(data.get("seq"))
+                if seq is None:
+                    logger.debug(f"Ignoring malformed audio_ack: {data}")
+                elif audio_stream:
+                    audio_stream.ack(websocket, seq)
+            
+            elif message_type == "audio_unsubscribe":
+                if audio_stream:
+                    await audio_stream.unsubscribe(websocket)
+            
     except WebSocketDisconnect:
         manager.disconnect(websocket)
         logger.info("WebSocket client disconnected normally")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         manager.disconnect(websocket)
+    finally:
+        if audio_stream:
+            await audio_stream.unsubscribe(websocket)
 
@@ -46,12 +46,110 @@ class Config:
             },
             "voice": {
                 "wake_words": ["computer", "hey computer", "nux", "hey nux"],
+                "wake_mode": "grammar",
+                "wake_partial_results": True,
+                "wake_phrase_sets": {},
                 "whisper_model": "base",
+                "stt_engine": "whisper",
+                "faster_whisper": {
+                    "compute_type": "int8",
+                    "cpu_threads": 0
+                },
+                "decode_profile": "balanced",
+                "decode_profiles": {
+                    "fast": {
+                        "beam_size": 1,
+                        "best_of": 1,
+                        "temperature": [0.0],
+                        "without_timestamps": True,
+                        "condition_on_previous_text": False,
+                        "threads": 0
+                    },
+                    "balanced": {
+                        "beam_size": 1,
+                        "best_of": 3,
+                        "temperature": [0.0, 0.4, 0.8],
+                        "without_timestamps": True,
+                        "condition_on_previous_text": False,
+                        "threads": 0
+                    },
+                    "accurate": {
+                        "beam_size": 5,
+                        "best_of": 5,
+                        "temperature": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+                        "without_timestamps": False,
+                        "condition_on_previous_text": True,
+                        "threads": 0
+                    }
+                },
+                "vocabulary_prompt": True,
+                "fast_path": {
+                    "enabled": False,
+                    "min_confidence": 0.8
+                },
+                "warmup": True,
                 "recording_duration": 5,
+                "debug_dump_audio": False,
+                "endpointing": {
+                    "enabled": True,
+                    "trailing_silence_ms": 700,
+                    "max_duration": 10,
+                    "no_speech_timeout": 3.0
+                },
+                "streaming": {
+                    "enabled": True,
+                    "interval_ms": 800,
+                    "window_seconds": 10.0
+                },
+                "stt_service": {
+                    "workers": 1,
+                    "queue_size": 8,
+                    "timeout": 15.0,
+                    "max_audio_seconds": 30.0
+                },
+                "autotune": {
+                    "enabled": False,
+                    "budget_ms_p95": 1500,
+                    "candidates": ["tiny", "base", "small"],
+                    "sample_dir": None,
+                    "rounds": 3
+                },
+                "stt_cpu": {
+                    "threads": 0,
+                    "interop_threads": 0,
+                    "cpu_affinity": [],
+                    "quantize_int8": False,
+                    "self_benchmark": True
+                },
+                "batching": {
+                    "enabled": False,
+                    "max_batch_size": 4,
+                    "max_wait_ms": 30
+                },
                 "tts_rate": 175,
                 "tts_volume": 0.9,
                 "tts_voice_index": None
             },
+            "audio": {
+                "frame_size": 1024,
+                "buffer_seconds": 5.0,
+                "device_index": None,
+                "vad": {
+                    "enabled": True,
+                    "energy_threshold": 0.01,
+                    "max_zcr": 0.35,
+                    "hangover_frames": 8,
+                    "reset_after_silence_ms": 1500
+                },
+                "preprocess": {
+                    "enabled": True,
+                    "speech_threshold": 0.01,
+                    "frame_ms": 20,
+                    "margin_ms": 200,
+                    "target_peak": 0.9,
+                    "max_gain": 10.0
+                }
+            },
             "server": {
                 "host": "127.0.0.1",
                 "port": 8000
@@ -61,6 +159,40 @@ class Config:
                 "voice_recognition": True,
                 "text_to_speech": True,
                 "intent_parsing": True
+            },
+            "tts": {
+                "engine": "pyttsx3",
+                "piper": {
+                    "model": None,
+                    "executable": "piper",
+                    "sample_rate": 22050,
+                    "speaker": None,
+                    "timeout": 15
+                },
+                "max_chunk_chars": 200,
+                "cache": {
+                    "enabled": True,
+                    "directory": None,
+                    "max_mb": 50,
+                    "max_chars": 200
+                },
+                "remote_audio": {
+                    "enabled": False,
+                    "play_locally": True,
+                    "window": 20,
+                    "frame_ms": 100,
+                    "max_buffer_frames": 300,
+                    "stall_timeout": 5
+                }
+            },
+            "models": {
+                "idle_unload": False,
+                "idle_seconds": {
+                    "whisper": 300,
+                    "llm": 600
+                },
+                "check_interval": 30,
+                "reload_on_wake": True
             }
         }
     
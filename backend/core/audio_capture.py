@@ -0,0 +1,347 @@
+"""
+Audio Capture Module (v1.1)
+Shared microphone bus: one capture thread, many subscribers
+"""
+import asyncio
+import threading
+import time
+import numpy as np
+import pyaudio
+from typing import Optional, Dict, Any, List
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class _OverflowDetector:
+    """Spots audio PortAudio dropped because the input buffer overflowed
+
+    Blocking reads do not report overflows without discarding the frame
+    just read, so this compares the audio received with the wall-clock time
+    that passed. Lost input shows up as a lasting jump in their difference;
+    a read that was merely late (served from the buffer) only spikes it,
+    which the minimum over each window of reads filters out. Slow clock
+    drift between the sound card and the system is absorbed gradually.
+    """
+
+    WINDOW = 16  # Reads per check (about 1 s at 64 ms frames)
+    GAP_FRAMES = 2  # Audio missing beyond this many frames counts as an overflow
+
+    def __init__(self, frame_seconds: float):
+        self.frame_seconds = frame_seconds
+        self.reset()
+
+    def reset(self):
+        """Start over, e.g. after the device was reopened"""
+        self.captured = 0.0
+        self.baseline: Optional[float] = None  # Wall-clock time minus audio time
+        self.window_min = float("inf")
+        self.reads = 0
+
+    def frame(self, now: float) -> bool:
+        """Account for one frame read at now; True if an overflow was detected"""
+        self.captured += self.frame_seconds
+        self.window_min = min(self.window_min, now - self.captured)
+        self.reads += 1
+        if self.reads < self.WINDOW:
+            return False
+
+        offset, self.window_min, self.reads = self.window_min, float("inf"), 0
+        if self.baseline is None or offset < self.baseline:
+            self.baseline = offset
+            return False
+        if offset - self.baseline > self.GAP_FRAMES * self.frame_seconds:
+            self.baseline = offset
+            return True
+        self.baseline += (offset - self.baseline) * 0.1
+        return False
+
+
+class AudioRingBuffer:
+    """Fixed-size ring of int16 frames with one writer and any number of readers
+
+    The writer fills the slot and only then advances ``write_index``, so a
+    reader never sees a partially written frame. No lock is needed because
+    there is exactly one writer thread and the index update is atomic.
+    """
+
+    def __init__(self, capacity: int, frame_size: int):
+        self.capacity = capacity
+        self.frame_size = frame_size
+        self.frames = np.zeros((capacity, frame_size), dtype=np.int16)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.write_index = 0  # Total frames written (monotonic)
+
+    def write(self, data: bytes, timestamp: float):
+        """Copy one frame into the next slot and publish it"""
+        slot = self.write_index % self.capacity
+        self.frames[slot] = np.frombuffer(data, dtype=np.int16)
+        self.timestamps[slot] = timestamp
+        self.write_index += 1
+
+    def oldest_index(self) -> int:
+        """Index of the oldest frame still held in the buffer"""
+        return max(0, self.write_index - self.capacity)
+
+    def get(self, index: int) -> Optional[np.ndarray]:
+        """Return a view of frame ``index`` or None if it was overwritten"""
+        if index < self.oldest_index() or index >= self.write_index:
+            return None
+        return self.frames[index % self.capacity]
+
+
+class AudioSubscription:
+    """A reader with its own cursor into the bus ring buffer"""
+
+    def __init__(self, bus: "AudioBus", name: str, start_index: int, skip_samples: int = 0):
+        self.bus = bus
+        self.name = name
+        self.read_index = start_index
+        self.skip_samples = skip_samples  # Leading samples to drop from the first frame
+        self.dropped_frames = 0
+        self.closed = False
+        self._event = asyncio.Event()
+
+    async def read(self) -> Optional[np.ndarray]:
+        """Wait for the next frame without blocking the event loop
+
+        Returns a view into the shared ring buffer (no copy), valid until the
+        capture thread wraps around to the same slot. Returns None once the
+        subscription is closed or the bus stops.
+        """
+        ring = self.bus.ring
+        while True:
+            if self.closed:
+                return None
+            while self.read_index >= ring.write_index:
+                if self.closed or not self.bus.running:
+                    return None
+                self._event.clear()
+                if self.read_index >= ring.write_index:
+                    await self._event.wait()
+
+            oldest = ring.oldest_index()
+            if self.read_index < oldest:
+                self.dropped_frames += oldest - self.read_index
+                self.read_index = oldest
+                self.skip_samples = 0
+
+            frame = ring.get(self.read_index)
+            if frame is not None:
+                break
+            # The capture thread overwrote the slot after the clamp; catch up again
+
+        self.read_index += 1
+
+        if self.skip_samples:
+            frame = frame[self.skip_samples:]
+            self.skip_samples = 0
+        return frame
+
+    def seek(self, index: int):
+        """Move the cursor, clamped to the frames still in the buffer"""
+        ring = self.bus.ring
+        self.read_index = max(ring.oldest_index(), min(index, ring.write_index))
+        self.skip_samples = 0
+
+    def close(self):
+        """Detach from the bus"""
+        self.closed = True
+        self._event.set()
+        self.bus.unsubscribe(self)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-subscriber counters"""
+        return {
+            "dropped_frames": self.dropped_frames,
+            "buffered_frames": self.bus.ring.write_index - self.read_index
+        }
+
+
+class AudioBus:
+    """Long-lived microphone capture shared by all audio consumers"""
+
+    SAMPLE_RATE = 16000
+    SAMPLE_WIDTH = 2  # int16
+    FRAME_SIZE = 1024  # 64 ms at 16 kHz
+    BUFFER_SECONDS = 5.0  # Also the pre-roll available to late subscribers
+    MAX_REOPEN_DELAY = 5.0
+
+    def __init__(self, frame_size: int = None, buffer_seconds: float = None,
+                 device_index: Optional[int] = None):
+        self.frame_size = frame_size or self.FRAME_SIZE
+        self.buffer_seconds = buffer_seconds or self.BUFFER_SECONDS
+        self.device_index = device_index
+
+        capacity = max(2, int(self.SAMPLE_RATE * self.buffer_seconds / self.frame_size))
+        self.ring = AudioRingBuffer(capacity, self.frame_size)
+        self.subscribers: List[AudioSubscription] = []
+
+        self.audio = None
+        self.stream = None
+        self.running = False
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Statistics
+        self.overflows = 0
+        self._overflow_detector = _OverflowDetector(self.frame_size / self.SAMPLE_RATE)
+        self.reopens = 0
+
+    async def start(self):
+        """Open the microphone and start the capture thread (idempotent)"""
+        if self.running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._open_stream()
+
+        self.running = True
+        self._thread = threading.Thread(
+            target=self._capture_loop,
+            name="nuxai-audio-capture",
+            daemon=True
+        )
+        self._thread.start()
+        logger.info(f"🎙️ Audio bus started ({self.frame_size} samples/frame, "
+                    f"{self.ring.capacity} frame buffer)")
+
+    def position(self) -> int:
+        """Absolute sample position of the live edge of the stream"""
+        return self.ring.write_index * self.frame_size
+
+    def position_time(self, position: int) -> Optional[float]:
+        """Approximate time.monotonic() at which a buffered sample was captured"""
+        index, offset = divmod(position, self.frame_size)
+        if index < self.ring.oldest_index() or index >= self.ring.write_index:
+            return None
+        frame_end = self.ring.timestamps[index % self.ring.capacity]
+        return float(frame_end) - (self.frame_size - offset) / self.SAMPLE_RATE
+
+    def subscribe(self, name: str, start_position: Optional[int] = None) -> AudioSubscription:
+        """Register a new reader
+
+        By default reading starts at the live edge. ``start_position`` (an
+        absolute sample position) starts it in the past instead, replaying
+        whatever part of the buffered pre-roll is still available.
+        """
+        if start_position is None:
+            subscription = AudioSubscription(self, name, self.ring.write_index)
+        else:
+            start_position = max(0, min(start_position, self.position()))
+            index, skip = divmod(start_position, self.frame_size)
+            if index < self.ring.oldest_index():
+                index, skip = self.ring.oldest_index(), 0
+            subscription = AudioSubscription(self, name, index, skip)
+        self.subscribers.append(subscription)
+        logger.debug(f"Audio bus subscriber added: {name}")
+        return subscription
+
+    def unsubscribe(self, subscription: AudioSubscription):
+        """Remove a reader"""
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+            logger.debug(f"Audio bus subscriber removed: {subscription.name}")
+
+    def _open_stream(self):
+        """(Re)create PortAudio and open the input stream"""
+        # A fresh PyAudio instance rescans devices after a hot-unplug
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.SAMPLE_RATE,
+            input=True,
+            input_device_index=self.device_index,
+            frames_per_buffer=self.frame_size
+        )
+
+    def _close_stream(self):
+        """Release the input stream and PortAudio"""
+        if self.stream:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except Exception:
+                pass
+            self.stream = None
+        if self.audio:
+            try:
+                self.audio.terminate()
+            except Exception:
+                pass
+            self.audio = None
+
+    def _reopen(self) -> bool:
+        """Reopen the device with exponential backoff until it comes back"""
+        self._close_stream()
+        delay = 0.25
+
+        while self.running:
+            try:
+                self._open_stream()
+                self.reopens += 1
+                logger.info("🎙️ Audio device reopened")
+                return True
+            except Exception as e:
+                logger.debug(f"Audio device still unavailable: {e}")
+                self._close_stream()
+                time.sleep(delay)
+                delay = min(delay * 2, self.MAX_REOPEN_DELAY)
+
+        return False
+
+    def _capture_loop(self):
+        """Blocking read loop (runs on the capture thread)"""
+        self._overflow_detector.reset()
+        while self.running:
+            try:
+                # Keep the frame even if input overflowed before it
+                data = self.stream.read(self.frame_size, exception_on_overflow=False)
+            except IOError as e:
+                if not self.running:
+                    break
+                logger.warning(f"Audio device lost ({e}), reopening...")
+                if not self._reopen():
+                    break
+                self._overflow_detector.reset()
+                continue
+
+            now = time.monotonic()
+            if self._overflow_detector.frame(now):
+                self.overflows += 1
+            self.ring.write(data, now)
+            self._loop.call_soon_threadsafe(self._notify)
+
+        # Wake up readers waiting on a stream that has gone away
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._notify)
+
+    def _notify(self):
+        """Signal every subscriber that new audio is available (event loop)"""
+        for subscription in self.subscribers:
+            subscription._event.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Bus and subscriber counters for status reporting"""
+        return {
+            "running": self.running,
+            "frames_captured": self.ring.write_index,
+            "overflows": self.overflows,
+            "reopens": self.reopens,
+            "subscribers": {
+                subscription.name: subscription.get_stats()
+                for subscription in self.subscribers
+            }
+        }
+
+    def stop(self):
+        """Stop the capture thread and release the device"""
+        self.running = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        self._close_stream()
+
+        for subscription in list(self.subscribers):
+            subscription.close()
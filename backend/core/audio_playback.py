@@ -0,0 +1,74 @@
+"""
+Audio Playback (v1.1)
+Plays WAV files and PCM chunks on the default output device
+"""
+import wave
+import pyaudio
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class AudioPlayer:
+    """Blocking playback in small chunks so it can be stopped between them
+
+    ``should_stop`` is checked before every chunk (barge-in) and ``on_start``
+    runs just before the first chunk reaches the device.
+    """
+
+    CHUNK_FRAMES = 1024
+
+    def __init__(self, device_index: Optional[int] = None):
+        self.device_index = device_index
+        self.audio = None
+
+    def play_wav(self, path: Path, should_stop: Callable[[], bool] = None,
+                 on_start: Callable[[], None] = None) -> bool:
+        """Play a WAV file, returning False if it was stopped early"""
+        with wave.open(str(path), "rb") as wav:
+            chunks = iter(lambda: wav.readframes(self.CHUNK_FRAMES), b"")
+            return self.play_pcm(chunks, wav.getframerate(), should_stop, on_start,
+                                 sample_width=wav.getsampwidth(), channels=wav.getnchannels())
+
+    def play_pcm(self, chunks: Iterable[bytes], sample_rate: int, should_stop: Callable[[], bool] = None,
+                 on_start: Callable[[], None] = None, sample_width: int = 2, channels: int = 1) -> bool:
+        """Play raw little-endian PCM chunks as they arrive"""
+        if self.audio is None:
+            self.audio = pyaudio.PyAudio()
+
+        stream = self.audio.open(
+            format=self.audio.get_format_from_width(sample_width),
+            channels=channels,
+            rate=sample_rate,
+            output=True,
+            output_device_index=self.device_index,
+            frames_per_buffer=self.CHUNK_FRAMES
+        )
+        started = False
+        try:
+            for chunk in chunks:
+                if should_stop and should_stop():
+                    return False
+                if not started:
+                    started = True
+                    if on_start:
+                        on_start()
+                stream.write(chunk)
+            return True
+        finally:
+            try:
+                stream.stop_stream()
+                stream.close()
+            except Exception:
+                pass
+
+    def close(self):
+        """Release PortAudio"""
+        if self.audio:
+            try:
+                self.audio.terminate()
+            except Exception:
+                pass
+            self.audio = None
@@ -0,0 +1,111 @@
+"""
+Audio Preprocessing (v1.1)
+Vectorized DC removal, silence trimming and gain normalization before STT
+"""
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, Any
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+def frame_levels(audio: np.ndarray, frame_size: int) -> np.ndarray:
+    """RMS of each frame_size block of float32 audio (last block zero-padded)"""
+    frames = -(-len(audio) // frame_size)
+    padded = np.zeros(frames * frame_size, dtype=np.float32)
+    padded[:len(audio)] = audio
+    blocks = padded.reshape(frames, frame_size)
+    return np.sqrt(np.einsum("ij,ij->i", blocks, blocks) / frame_size)
+
+
+@dataclass
+class PreprocessResult:
+    """Audio ready for STT, or has_speech=False if the model can be skipped"""
+    audio: np.ndarray
+    has_speech: bool
+    trimmed_ms: int = 0  # Leading plus trailing silence removed
+    gain: float = 1.0
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+
+class AudioPreprocessor:
+    """Cleans up a recorded command before it is transcribed
+
+    Steps, each timed: remove DC offset, find voiced frames by RMS (returning
+    early when there are none), trim leading and trailing silence down to
+    ``margin_ms``, then scale so the peak reaches ``target_peak`` (at most
+    ``max_gain``, so quiet noise is not blown up).
+    """
+
+    def __init__(self, speech_threshold: float = 0.01, frame_ms: int = 20, margin_ms: int = 200,
+                 target_peak: float = 0.9, max_gain: float = 10.0):
+        self.speech_threshold = speech_threshold
+        self.frame_size = int(SAMPLE_RATE * frame_ms / 1000)
+        self.margin = int(SAMPLE_RATE * margin_ms / 1000)
+        self.target_peak = target_peak
+        self.max_gain = max_gain
+
+        # Statistics
+        self.processed = 0
+        self.no_speech = 0
+        self.trimmed_ms_total = 0
+        self.step_ms_total: Dict[str, float] = {"dc": 0.0, "detect": 0.0, "trim": 0.0, "normalize": 0.0}
+
+    def process(self, audio: np.ndarray) -> PreprocessResult:
+        """Preprocess float32 16 kHz audio"""
+        timings = {}
+        self.processed += 1
+
+        start = time.perf_counter()
+        audio = audio - np.mean(audio, dtype=np.float32) if len(audio) else audio
+        timings["dc"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        voiced = np.flatnonzero(frame_levels(audio, self.frame_size) >= self.speech_threshold) \
+            if len(audio) else np.empty(0, dtype=np.intp)
+        timings["detect"] = (time.perf_counter() - start) * 1000
+
+        if len(voiced) == 0:
+            self.no_speech += 1
+            self._record(timings)
+            return PreprocessResult(audio, has_speech=False, timings_ms=timings)
+
+        start = time.perf_counter()
+        begin = max(0, voiced[0] * self.frame_size - self.margin)
+        end = min(len(audio), (voiced[-1] + 1) * self.frame_size + self.margin)
+        trimmed_ms = int(len(audio) - (end - begin)) * 1000 // SAMPLE_RATE
+        audio = audio[begin:end]
+        timings["trim"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        peak = float(np.max(np.abs(audio)))
+        gain = min(self.max_gain, self.target_peak / peak) if peak > 0 else 1.0
+        if gain > 1.0:
+            audio = audio * np.float32(gain)
+        else:
+            gain = 1.0  # Never attenuate; clipping is already baked in
+        timings["normalize"] = (time.perf_counter() - start) * 1000
+
+        self.trimmed_ms_total += trimmed_ms
+        self._record(timings)
+        return PreprocessResult(audio, True, trimmed_ms, round(gain, 2), timings)
+
+    def _record(self, timings: Dict[str, float]):
+        for step, elapsed in timings.items():
+            self.step_ms_total[step] += elapsed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Skip counts, silence removed and mean time per step"""
+        return {
+            "processed": self.processed,
+            "no_speech_skipped": self.no_speech,
+            "trimmed_ms_total": self.trimmed_ms_total,
+            "step_ms_mean": {
+                step: round(total / self.processed, 3) if self.processed else 0.0
+                for step, total in self.step_ms_total.items()
+            }
+        }
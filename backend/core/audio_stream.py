@@ -0,0 +1,258 @@
+"""
+Remote Audio Streaming (v1.1)
+Sends synthesized speech to overlay clients as binary WebSocket frames
+"""
+import asyncio
+import itertools
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Union
+from fastapi import WebSocket
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Binary frame header: stream id and the connection's frame sequence number
+FRAME_HEADER = struct.Struct("<II")
+
+
+@dataclass(eq=False)
+class _Frame:
+    stream: int
+    pcm: bytes
+
+
+@dataclass(eq=False)
+class _AudioClient:
+    """One subscribed overlay connection"""
+    websocket: WebSocket
+    window: int  # Frames that may be sent without being acknowledged
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    next_seq: int = 0
+    acked: int = -1
+    queued_frames: int = 0
+    credit: asyncio.Event = field(default_factory=asyncio.Event)
+    skip_streams: set = field(default_factory=set)  # Cancelled or overflowed
+    sender: Optional[asyncio.Task] = None
+
+    def in_flight(self) -> int:
+        return self.next_seq - 1 - self.acked
+
+
+class AudioStreamHub:
+    """Fans synthesized PCM out to subscribed overlay clients
+
+    Each response sentence is one stream: an ``audio_start`` JSON message,
+    binary frames of ``frame_ms`` of 16-bit mono PCM (prefixed with
+    :data:`FRAME_HEADER`), then ``audio_end``. Frames are sent while later
+    audio is still being synthesized.
+
+    Every client gets its own sender task and credit window: at most
+    ``window`` frames may be unacknowledged (``audio_ack`` with the highest
+    sequence number received). A client that stops acknowledging for
+    ``stall_timeout`` seconds, or falls ``max_buffer_frames`` behind, loses the
+    rest of that stream instead of holding up speech for everyone else.
+
+    ``start_stream``/``publish``/``end_stream`` are called from the speech
+    thread; everything else runs on the event loop.
+    """
+
+    def __init__(self, window: int = 20, frame_ms: int = 100, max_buffer_frames: int = 300,
+                 stall_timeout: float = 5.0):
+        self.default_window = window
+        self.frame_ms = frame_ms
+        self.max_buffer_frames = max_buffer_frames
+        self.stall_timeout = stall_timeout
+
+        self.clients: Dict[WebSocket, _AudioClient] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stream_ids = itertools.count(1)
+        self._frame_bytes: Dict[int, int] = {}  # Per stream
+        self._pending: Dict[int, bytes] = {}  # Partial frame per stream
+        self._started: Dict[int, float] = {}
+
+        # Statistics
+        self.streams = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.frames_dropped = 0
+        self.stalls = 0
+        self._first_frame_ms = deque(maxlen=200)
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self.clients)
+
+    async def subscribe(self, websocket: WebSocket, window: int = None) -> int:
+        """Start sending speech audio to a connection"""
+        self.loop = asyncio.get_running_loop()
+        await self.unsubscribe(websocket)
+
+        client = _AudioClient(websocket, max(1, int(window or self.default_window)))
+        client.credit.set()
+        client.sender = asyncio.create_task(self._send_loop(client))
+        self.clients[websocket] = client
+        logger.info(f"🔈 Remote audio subscriber added (window {client.window} frames)")
+        return client.window
+
+    async def unsubscribe(self, websocket: WebSocket):
+        """Stop sending audio to a connection (also on disconnect)"""
+        client = self.clients.pop(websocket, None)
+        if client and client.sender:
+            client.sender.cancel()
+            logger.info("🔈 Remote audio subscriber removed")
+
+    def ack(self, websocket: WebSocket, seq: int):
+        """A client received every frame up to seq"""
+        client = self.clients.get(websocket)
+        if client and seq > client.acked:
+            client.acked = min(seq, client.next_seq - 1)
+            if client.in_flight() < client.window:
+                client.credit.set()
+
+    # Speech thread side
+
+    def start_stream(self, sample_rate: int, text: str = "") -> int:
+        """Announce a new stream of audio"""
+        stream = next(self._stream_ids)
+        self._frame_bytes[stream] = max(2, int(sample_rate * self.frame_ms / 1000) * 2)
+        self._pending[stream] = b""
+        self._started[stream] = time.perf_counter()
+        self.streams += 1
+        self._dispatch({
+            "type": "audio_start",
+            "stream": stream,
+            "format": "pcm_s16le",
+            "sample_rate": sample_rate,
+            "channels": 1,
+            "text": text
+        })
+        return stream
+
+    def publish(self, stream: int, pcm: bytes):
+        """Queue synthesized PCM, split into frames"""
+        data = self._pending.get(stream, b"") + pcm
+        size = self._frame_bytes[stream]
+        whole = len(data) - len(data) % size
+        self._pending[stream] = data[whole:]
+        for offset in range(0, whole, size):
+            self._dispatch(_Frame(stream, data[offset:offset + size]))
+
+    def end_stream(self, stream: int, interrupted: bool = False):
+        """Flush the last partial frame and close the stream"""
+        rest = self._pending.pop(stream, b"")
+        if rest and not interrupted:
+            self._dispatch(_Frame(stream, rest))
+        self._frame_bytes.pop(stream, None)
+        self._dispatch({"type": "audio_end", "stream": stream, "interrupted": interrupted})
+
+    def cancel(self):
+        """Barge-in: clients drop audio they have buffered but not played"""
+        self._dispatch({"type": "audio_cancel"})
+
+    def _dispatch(self, item: Union[_Frame, Dict[str, Any]]):
+        if self.loop is None:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._enqueue, item)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    # Event loop side
+
+    def _enqueue(self, item: Union[_Frame, Dict[str, Any]]):
+        if isinstance(item, dict) and item["type"] == "audio_cancel":
+            for client in self.clients.values():
+                self._drop_queued(client)
+        elif isinstance(item, dict) and item["type"] == "audio_end" and item["interrupted"]:
+            # Frames still queued for this stream are stale
+            for client in self.clients.values():
+                client.skip_streams.add(item["stream"])
+
+        for client in list(self.clients.values()):
+            if isinstance(item, _Frame):
+                if item.stream in client.skip_streams:
+                    self.frames_dropped += 1
+                    continue
+                if client.queued_frames >= self.max_buffer_frames:
+                    logger.warning("🔈 Remote audio client too far behind, dropping the rest of the stream")
+                    client.skip_streams.add(item.stream)
+                    self.frames_dropped += 1
+                    continue
+                client.queued_frames += 1
+            client.queue.put_nowait(item)
+
+    def _drop_queued(self, client: _AudioClient):
+        """Discard a client's unsent frames, keeping the control messages"""
+        kept = []
+        while not client.queue.empty():
+            item = client.queue.get_nowait()
+            if isinstance(item, _Frame):
+                self.frames_dropped += 1
+            else:
+                kept.append(item)
+        for item in kept:
+            client.queue.put_nowait(item)
+        client.queued_frames = 0
+
+    async def _send_loop(self, client: _AudioClient):
+        """Send one client's audio in order, within its credit window"""
+        websocket = client.websocket
+        try:
+            while True:
+                item = await client.queue.get()
+                if isinstance(item, dict):
+                    if item["type"] == "audio_end":
+                        client.skip_streams.discard(item["stream"])
+                        self._started.pop(item["stream"], None)
+                    await websocket.send_json(item)
+                    continue
+
+                client.queued_frames -= 1
+                if item.stream in client.skip_streams:
+                    self.frames_dropped += 1
+                    continue
+
+                if client.in_flight() >= client.window:
+                    client.credit.clear()
+                    try:
+                        await asyncio.wait_for(client.credit.wait(), self.stall_timeout)
+                    except asyncio.TimeoutError:
+                        self.stalls += 1
+                        logger.warning(f"🔈 Remote audio client sent no ack for {self.stall_timeout}s, "
+                                       f"dropping the rest of the stream")
+                        client.skip_streams.add(item.stream)
+                        client.acked = client.next_seq - 1  # Start the next stream with a full window
+                        self.frames_dropped += 1
+                        continue
+
+                await websocket.send_bytes(FRAME_HEADER.pack(item.stream, client.next_seq) + item.pcm)
+                client.next_seq += 1
+                self.frames_sent += 1
+                self.bytes_sent += len(item.pcm)
+
+                started = self._started.pop(item.stream, None)
+                if started is not None:
+                    self._first_frame_ms.append((time.perf_counter() - started) * 1000)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.debug(f"Remote audio send failed: {e}")
+            self.clients.pop(websocket, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Subscribers, throughput and flow-control events"""
+        first_frame_ms = list(self._first_frame_ms)
+        return {
+            "subscribers": len(self.clients),
+            "streams": self.streams,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "frames_dropped": self.frames_dropped,
+            "stalls": self.stalls,
+            "first_frame_ms_mean": round(sum(first_frame_ms) / len(first_frame_ms), 1) if first_frame_ms else 0.0,
+            "frame_ms": self.frame_ms,
+            "window": self.default_window
+        }
@@ -0,0 +1,198 @@
+"""
+Model Autotune (v1.1)
+Picks the largest Whisper model that meets a latency budget on this machine
+"""
+import hashlib
+import json
+import os
+import platform
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from utils.logger import setup_logger
+from core.benchmark import SAMPLE_RATE, percentile, read_wav
+
+logger = setup_logger(__name__)
+
+CACHE_FILE = Path.home() / ".nuxai" / "autotune.json"
+
+# Smallest to largest; a model slower than the budget rules out the rest
+MODEL_SIZES = ["tiny", "base", "small", "medium", "large"]
+
+
+def machine_fingerprint(settings: Dict[str, Any]) -> str:
+    """Stable key for this hardware plus the settings that affect STT speed"""
+    memory_kb = 0
+    try:
+        with open("/proc/meminfo") as f:
+            memory_kb = int(f.readline().split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+
+    identity = {
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "memory_gb": round(memory_kb / 1024 / 1024),
+        "settings": settings
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def sample_files(sample_dir: Optional[str]) -> List[Path]:
+    """The sample command recordings in sample_dir"""
+    return sorted(Path(sample_dir).glob("*.wav")) if sample_dir else []
+
+
+def sample_set(sample_dir: Optional[str]) -> Any:
+    """Identity of the benchmark audio, so new or edited samples invalidate the cache"""
+    files = sample_files(sample_dir)
+    if not files:
+        return "synthetic"
+    return [[str(path.resolve()), path.stat().st_mtime_ns, path.stat().st_size] for path in files]
+
+
+def load_sample_audio(sample_dir: Optional[str]) -> List[np.ndarray]:
+    """Sample commands from sample_dir/*.wav, or a synthetic clip if there are none"""
+    if sample_dir:
+        audios = [read_wav(path) for path in sample_files(sample_dir)]
+        if audios:
+            return audios
+        logger.warning(f"No .wav files in {sample_dir}")
+
+    logger.warning("No sample recordings, timing a synthetic 3 s clip "
+                   "(decoder cost of real speech is underestimated)")
+    return [np.random.default_rng(0).normal(0, 0.05, SAMPLE_RATE * 3).astype(np.float32)]
+
+
+def _measure_model(engine: str, model_size: str, engine_options: Dict[str, Any],
+                   cpu_options: Dict[str, Any], profile: Dict[str, Any],
+                   audios: List[np.ndarray], rounds: int) -> List[float]:
+    """Per-command latencies of one model (runs in a fresh process)"""
+    from core.stt_backend import apply_cpu_affinity, create_stt_backend
+
+    apply_cpu_affinity(cpu_options.get("cpu_affinity"))
+    backend = create_stt_backend(engine, model_size, engine_options,
+                                 profile.get("threads", 0), cpu_options)
+    backend.load()
+    backend.warmup()
+    options = backend.decode_options(profile)
+
+    latencies = []
+    for _ in range(rounds):
+        for audio in audios:
+            start = time.perf_counter()
+            backend.transcribe(audio, **dict(options))
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+class ModelAutotuner:
+    """Benchmarks candidate model sizes and caches the choice per machine"""
+
+    def __init__(self, voice_config: Dict[str, Any]):
+        from core.stt_backend import resolve_decode_profile
+
+        autotune = voice_config.get("autotune", {})
+        self.budget_ms = autotune.get("budget_ms_p95", 1500)
+        self.candidates = [m for m in MODEL_SIZES if m in autotune.get("candidates", ["tiny", "base", "small"])]
+        self.sample_dir = autotune.get("sample_dir")
+        self.rounds = autotune.get("rounds", 3)
+        self.fallback_model = voice_config.get("whisper_model", "base")
+
+        self.engine = voice_config.get("stt_engine", "whisper")
+        self.engine_options = voice_config.get("faster_whisper", {}) if self.engine == "faster-whisper" else {}
+        self.cpu_options = voice_config.get("stt_cpu", {})
+        self.profile_name = voice_config.get("decode_profile", "balanced")
+        self.profile = resolve_decode_profile(self.profile_name, voice_config.get("decode_profiles", {}))
+
+        self.fingerprint = machine_fingerprint({
+            "engine": self.engine,
+            "engine_options": self.engine_options,
+            "stt_cpu": self.cpu_options,
+            "profile": self.profile,
+            "budget_ms_p95": self.budget_ms,
+            "candidates": self.candidates,
+            "samples": sample_set(self.sample_dir)
+        })
+
+    def cached_choice(self) -> Optional[Dict[str, Any]]:
+        """The stored decision for this machine and settings, if any"""
+        try:
+            cache = json.loads(CACHE_FILE.read_text())
+        except (OSError, ValueError):
+            return None
+        return cache.get(self.fingerprint)
+
+    def _save(self, decision: Dict[str, Any]):
+        try:
+            cache = json.loads(CACHE_FILE.read_text()) if CACHE_FILE.exists() else {}
+        except ValueError:
+            cache = {}
+        cache[self.fingerprint] = decision
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        CACHE_FILE.write_text(json.dumps(cache, indent=2))
+
+    def run(self) -> Dict[str, Any]:
+        """Benchmark candidates from smallest up and store the decision"""
+        audios = load_sample_audio(self.sample_dir)
+        results = []
+        chosen = None
+
+        for model_size in self.candidates:
+            logger.info(f"⏱️ Autotune: timing {self.engine} {model_size}...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                try:
+                    latencies = pool.submit(
+                        _measure_model, self.engine, model_size, self.engine_options,
+                        self.cpu_options, self.profile, audios, self.rounds
+                    ).result()
+                except Exception as e:
+                    logger.warning(f"Autotune: {model_size} failed: {e}")
+                    break
+
+            p95 = percentile(latencies, 95)
+            fits = p95 <= self.budget_ms
+            results.append({
+                "model": model_size,
+                "latency_ms_mean": round(sum(latencies) / len(latencies), 1),
+                "latency_ms_p95": round(p95, 1),
+                "fits_budget": fits
+            })
+            if not fits:
+                break
+            chosen = model_size
+
+        if not results:
+            # Nothing could be measured; do not cache a guess
+            logger.warning(f"Autotune: no model could be benchmarked, using {self.fallback_model}")
+            return {"model": self.fallback_model, "budget_ms_p95": self.budget_ms, "results": []}
+
+        if chosen is None:
+            chosen = self.candidates[0]
+            logger.warning(f"Autotune: no model meets {self.budget_ms} ms p95, using {chosen}")
+
+        decision = {
+            "model": chosen,
+            "budget_ms_p95": self.budget_ms,
+            "engine": self.engine,
+            "decode_profile": self.profile_name,
+            "results": results,
+            "timestamp": datetime.now().isoformat()
+        }
+        self._save(decision)
+        logger.info(f"✅ Autotune picked Whisper {chosen} (p95 budget {self.budget_ms} ms)")
+        return decision
+
+    def select_model(self) -> str:
+        """Cached choice, benchmarking first if this machine has none"""
+        decision = self.cached_choice()
+        if decision:
+            logger.info(f"🎯 Autotune: using cached choice Whisper {decision['model']}")
+            return decision["model"]
+        return self.run()["model"]
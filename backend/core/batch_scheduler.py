@@ -0,0 +1,121 @@
+"""
+Batch Scheduler (v1.1)
+Groups concurrent transcription requests into batched STT calls
+"""
+import asyncio
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass(eq=False)
+class _Pending:
+    """A request waiting for the next batch"""
+    audio: np.ndarray
+    options: Dict[str, Any]
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class BatchScheduler:
+    """Collects up to ``max_batch_size`` requests within ``max_wait_ms``
+
+    Requests with identical decode options share a batch. Batches run one at
+    a time on a dedicated thread; while one runs, new requests keep
+    accumulating and go out together as soon as it finishes.
+    """
+
+    def __init__(self, run_batch: Callable[[List[np.ndarray], Dict[str, Any]], List[str]],
+                 max_batch_size: int = 4, max_wait_ms: float = 30,
+                 executor: ThreadPoolExecutor = None):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+
+        self._pending: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running = False
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="nuxai-stt-batch")
+
+        # Statistics
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+        self._wait_ms = deque(maxlen=200)
+        self._batch_ms = deque(maxlen=200)
+
+    async def transcribe(self, audio: np.ndarray, options: Dict[str, Any]) -> str:
+        """Queue one utterance and wait for its transcript"""
+        loop = asyncio.get_running_loop()
+        request = _Pending(audio, options, loop.create_future())
+        self._pending.append(request)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await request.future
+
+    def _flush(self):
+        """Start a batch with the oldest request and those sharing its options"""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self._pending = [p for p in self._pending if not p.future.done()]
+        if self._running or not self._pending:
+            return
+
+        options = self._pending[0].options
+        batch = [p for p in self._pending if p.options == options][:self.max_batch_size]
+        self._pending = [p for p in self._pending if p not in batch]
+
+        self._running = True
+        asyncio.ensure_future(self._run(batch, options))
+
+    async def _run(self, batch: List[_Pending], options: Dict[str, Any]):
+        """Transcribe one batch on the scheduler thread"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        for request in batch:
+            self._wait_ms.append((start - request.enqueued) * 1000)
+
+        try:
+            texts = await loop.run_in_executor(
+                self._executor, self.run_batch, [request.audio for request in batch], options
+            )
+            for request, text in zip(batch, texts):
+                if not request.future.done():
+                    request.future.set_result(text)
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        finally:
+            self._batch_ms.append((time.perf_counter() - start) * 1000)
+            self.batches += 1
+            self.requests += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self._running = False
+            if self._pending:
+                self._flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch size and latency metrics"""
+        wait_ms = list(self._wait_ms)
+        batch_ms = list(self._batch_ms)
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000),
+            "batches": self.batches,
+            "requests": self.requests,
+            "batch_size_mean": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "wait_ms_mean": round(sum(wait_ms) / len(wait_ms), 1) if wait_ms else 0.0,
+            "batch_ms_mean": round(sum(batch_ms) / len(batch_ms), 1) if batch_ms else 0.0
+        }
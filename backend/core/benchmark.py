@@ -0,0 +1,311 @@
+"""
+Benchmarks (v1.1)
+Offline performance measurements for the voice pipeline
+"""
+import json
+import re
+import time
+import wave
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 1024
+
+
+def _read_pcm(wav_path: str) -> bytes:
+    """Raw int16 PCM of a 16 kHz mono WAV file"""
+    with wave.open(str(wav_path), 'rb') as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{wav_path}: expected 16 kHz mono 16-bit PCM")
+        return wf.readframes(wf.getnframes())
+
+
+def read_wav_frames(wav_path: str, frame_size: int = FRAME_SIZE) -> List[bytes]:
+    """Read a 16 kHz mono int16 WAV file as fixed-size frames"""
+    data = _read_pcm(wav_path)
+    step = frame_size * 2
+    return [data[i:i + step] for i in range(0, len(data), step)]
+
+
+def read_wav(wav_path: str) -> np.ndarray:
+    """Read a 16 kHz mono int16 WAV file as float32 samples in [-1, 1]"""
+    return np.frombuffer(_read_pcm(wav_path), dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def process_rss_mb() -> Tuple[float, float]:
+    """Current and peak resident set size of this process in MB (Linux)"""
+    values = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, amount, _ = line.split()
+                    values[key] = int(amount) / 1024
+    except OSError:
+        pass
+    return values.get("VmRSS:", 0.0), values.get("VmHWM:", 0.0)
+
+
+def _words(text: str) -> List[str]:
+    """Lowercase words without punctuation, for WER scoring"""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference: str, hypothesis: str) -> Tuple[int, int]:
+    """Word-level edit distance and reference length"""
+    ref, hyp = _words(reference), _words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,  # deletion
+                current[j - 1] + 1,  # insertion
+                previous[j - 1] + (ref_word != hyp_word)  # substitution
+            ))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_stt_samples(sample_dir: str) -> List[Tuple[str, str]]:
+    """(wav path, reference transcript) pairs: every foo.wav with a foo.txt next to it"""
+    samples = []
+    for wav_path in sorted(Path(sample_dir).glob("*.wav")):
+        reference = wav_path.with_suffix(".txt")
+        if reference.exists():
+            samples.append((str(wav_path), reference.read_text().strip()))
+        else:
+            logger.warning(f"No reference transcript for {wav_path.name}, skipped")
+    return samples
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark_wake_word(wav_path: str, modes: List[str] = None) -> List[Dict[str, Any]]:
+    """Compare wake word recognizer modes on a recording
+
+    Feeds the same audio through each recognizer mode and reports process
+    CPU time, real-time factor and per-frame decode latency.
+    """
+    from vosk import Model, SetLogLevel
+    from core.wake_word_detector import VOSK_MODEL_PATH, build_wake_matcher, create_wake_recognizer
+
+    SetLogLevel(-1)
+    modes = modes or ["full", "grammar"]
+    matcher = build_wake_matcher()
+    wake_words = matcher.phrases()
+    frames = read_wav_frames(wav_path)
+    audio_seconds = sum(len(f) for f in frames) / 2 / SAMPLE_RATE
+
+    model = Model(str(VOSK_MODEL_PATH))
+    results = []
+
+    for mode in modes:
+        recognizer = create_wake_recognizer(model, wake_words, mode, SAMPLE_RATE)
+        latencies = []
+        detections = 0
+
+        cpu_start = time.process_time()
+        for frame in frames:
+            start = time.perf_counter()
+            accepted = recognizer.AcceptWaveform(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            if accepted:
+                text = json.loads(recognizer.Result()).get("text", "")
+                if matcher.find_first(text):
+                    detections += 1
+        cpu_seconds = time.process_time() - cpu_start
+
+        results.append({
+            "mode": mode,
+            "audio_seconds": round(audio_seconds, 2),
+            "cpu_seconds": round(cpu_seconds, 3),
+            "cpu_percent": round(100 * cpu_seconds / audio_seconds, 1) if audio_seconds else 0.0,
+            "frame_latency_ms_mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "frame_latency_ms_p95": round(percentile(latencies, 95), 2),
+            "detections": detections
+        })
+
+    return results
+
+
+def _benchmark_stt_engine(engine: str, model_size: str, engine_options: Dict[str, Any],
+                          samples: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Measure one engine (runs in a fresh process so RSS is not shared)"""
+    from core.stt_backend import create_stt_backend
+
+    backend = create_stt_backend(engine, model_size, engine_options)
+    rss_before, _ = process_rss_mb()
+
+    start = time.perf_counter()
+    backend.load()
+    backend.warmup()
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    audio_seconds = 0.0
+    errors = 0
+    reference_words = 0
+    for wav_path, reference in samples:
+        audio = read_wav(wav_path)
+        audio_seconds += len(audio) / SAMPLE_RATE
+
+        start = time.perf_counter()
+        text = backend.transcribe(audio)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        sample_errors, sample_words = word_errors(reference, text)
+        errors += sample_errors
+        reference_words += sample_words
+
+    rss_after, rss_peak = process_rss_mb()
+    return {
+        "engine": engine,
+        "model": model_size,
+        "samples": len(samples),
+        "load_seconds": round(load_seconds, 2),
+        "latency_ms_mean": round(sum(latencies) / len(latencies), 1),
+        "latency_ms_p95": round(percentile(latencies, 95), 1),
+        "rtf": round(sum(latencies) / 1000 / audio_seconds, 3) if audio_seconds else 0.0,
+        "rss_mb": round(rss_after - rss_before, 1),
+        "rss_peak_mb": round(rss_peak, 1),
+        "wer": round(errors / reference_words, 3) if reference_words else 0.0
+    }
+
+
+def benchmark_stt(sample_dir: str, engines: List[str] = None, model_size: str = "base",
+                  engine_options: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    """Compare STT engines on a directory of WAV files with reference transcripts
+
+    Reports per-command latency, real-time factor, model RSS and word error
+    rate. Each engine runs in its own process.
+    """
+    engines = engines or ["whisper", "faster-whisper"]
+    samples = load_stt_samples(sample_dir)
+    if not samples:
+        raise ValueError(f"{sample_dir}: no .wav files with matching .txt transcripts")
+
+    results = []
+    for engine in engines:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            try:
+                results.append(pool.submit(
+                    _benchmark_stt_engine, engine, model_size, engine_options or {}, samples
+                ).result())
+            except ImportError as e:
+                logger.warning(f"Skipping {engine}: {e}")
+    return results
+
+
+def benchmark_batching(wav_path: str, batch_sizes: List[int] = None, model_size: str = "base",
+                       rounds: int = 3) -> List[Dict[str, Any]]:
+    """Throughput versus latency of batched Whisper decoding
+
+    Transcribes batches of copies of one recording and reports batch
+    latency and utterances per second for each batch size.
+    """
+    from core.stt_backend import WhisperBackend
+
+    batch_sizes = batch_sizes or [1, 2, 4, 8]
+    audio = read_wav(wav_path)
+    backend = WhisperBackend(model_size)
+    backend.load()
+    backend.warmup()
+
+    results = []
+    for batch_size in batch_sizes:
+        audios = [audio] * batch_size
+        latencies = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            backend.transcribe_batch(audios, temperature=0.0, without_timestamps=True)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        mean_ms = sum(latencies) / len(latencies)
+        results.append({
+            "batch_size": batch_size,
+            "batch_ms_mean": round(mean_ms, 1),
+            "batch_ms_p95": round(percentile(latencies, 95), 1),
+            "utterances_per_second": round(batch_size / (mean_ms / 1000), 2)
+        })
+    return results
+
+
+# Typical responses: a template, a command confirmation and a longer answer
+TTS_SAMPLE_TEXTS = [
+    "Done!",
+    "Opening that for you now! Opening firefox.",
+    "It is 21 degrees and sunny in London. Expect light rain this evening, "
+    "with temperatures dropping to 12 degrees overnight."
+]
+
+
+def benchmark_tts(engines: List[str] = None, engine_options: Dict[str, Dict[str, Any]] = None,
+                  texts: List[str] = None, rounds: int = 3) -> List[Dict[str, Any]]:
+    """Compare TTS engines on time to first audio and synthesis speed
+
+    Audio is synthesized, not played. First audio is when the engine hands
+    over its first PCM chunk; engines that cannot stream only do so once the
+    whole text is synthesized.
+    """
+    from core.tts_backend import create_tts_backend
+
+    engines = engines or ["pyttsx3", "piper"]
+    engine_options = engine_options or {}
+    texts = texts or TTS_SAMPLE_TEXTS
+
+    results = []
+    for engine in engines:
+        backend = create_tts_backend(engine, engine_options.get(engine, {}))
+        start = time.perf_counter()
+        try:
+            backend.load()
+        except Exception as e:
+            logger.warning(f"Skipping {engine}: {e}")
+            continue
+        load_seconds = time.perf_counter() - start
+
+        first_audio_ms = []
+        total_ms = []
+        audio_seconds = 0.0
+        try:
+            for _ in range(rounds):
+                for text in texts:
+                    start = time.perf_counter()
+                    first = None
+                    audio_bytes = 0
+                    for chunk in backend.synthesize(text):
+                        if first is None:
+                            first = time.perf_counter()
+                        audio_bytes += len(chunk)
+                    end = time.perf_counter()
+                    first_audio_ms.append(((first or end) - start) * 1000)
+                    total_ms.append((end - start) * 1000)
+                    audio_seconds += audio_bytes / 2 / backend.sample_rate
+        finally:
+            backend.close()
+
+        results.append({
+            "engine": engine,
+            "load_seconds": round(load_seconds, 2),
+            "first_audio_ms_mean": round(sum(first_audio_ms) / len(first_audio_ms), 1),
+            "first_audio_ms_p95": round(percentile(first_audio_ms, 95), 1),
+            "synth_ms_mean": round(sum(total_ms) / len(total_ms), 1),
+            "rtf": round(sum(total_ms) / 1000 / audio_seconds, 3) if audio_seconds else 0.0
+        })
+    return results
@@ -149,6 +149,15 @@ class IntentParser:
         
         return params
     
+    def get_examples(self) -> List[str]:
+        """All example commands, in intent order"""
+        return [
+            example
+            for patterns in self.intent_patterns.values()
+            for pattern_info in patterns
+            for example in pattern_info["examples"]
+        ]
+    
     def get_command_suggestions(self, partial_text: str) -> List[str]:
         """Get command suggestions based on partial input"""
         suggestions = []
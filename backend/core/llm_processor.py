@@ -2,6 +2,9 @@
 LLM Processor (v0.5)
 Local LLM integration for intelligent command understanding
 """
+import asyncio
+import threading
+import time
 from typing import Optional, Dict, Any, List
 from utils.logger import setup_logger
 
@@ -15,6 +18,8 @@ class LLMProcessor:
         self.model_name = model_name
         self.model = None
         self.enabled = False
+        self.last_used = time.monotonic()  # For idle unloading (core.model_manager)
+        self._load_lock = threading.Lock()
         
     def initialize(self):
         """Initialize the LLM model"""
@@ -39,6 +44,32 @@ class LLMProcessor:
             logger.error(f"LLM initialization error: {e}")
             self.enabled = False
     
+    def load_model(self) -> bool:
+        """Reload the model after unload_model() (blocking)"""
+        with self._load_lock:
+            if self.model is None and self.enabled:
+                from gpt4all import GPT4All
+                logger.info(f"🧠 Reloading LLM model: {self.model_name}...")
+                self.model = GPT4All(self.model_name)
+            return self.model is not None
+    
+    def unload_model(self, idle_seconds: float = 0) -> bool:
+        """Release the model; it is reloaded on the next request
+        
+        Returns False if it was used within idle_seconds after all.
+        """
+        with self._load_lock:
+            if time.monotonic() - self.last_used < idle_seconds:
+                return False
+            self.model = None
+            return True
+    
+    async def _ensure_model(self):
+        """Mark the model as used and reload it if it was unloaded"""
+        self.last_used = time.monotonic()
+        if self.model is None:
+            await asyncio.get_running_loop().run_in_executor(None, self.load_model)
+    
     async def process_command(self, command: str, context: str = "") -> Optional[Dict[str, Any]]:
         """
         Process command with LLM for better understanding
@@ -54,6 +85,7 @@ class LLMProcessor:
             return None
         
         try:
+            await self._ensure_model()
             prompt = self._build_prompt(command, context)
             response = self.model.generate(prompt, max_tokens=100)
             
@@ -94,6 +126,7 @@ Understand the following voice command and determine what action to take.
             return self._simple_compound_parse(command)
         
         try:
+            await self._ensure_model()
             prompt = f"""Break this compound command into individual actions:
 "{command}"
 
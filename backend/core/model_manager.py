@@ -0,0 +1,172 @@
+"""
+Model Lifecycle Manager (v1.1)
+Unloads idle models to keep the server small and reloads them on demand
+"""
+import asyncio
+import ctypes
+import gc
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, Optional
+from utils.logger import setup_logger
+from core.benchmark import process_rss_mb
+
+logger = setup_logger(__name__)
+
+
+def release_memory():
+    """Collect garbage and hand freed heap pages back to the OS (glibc)"""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+@dataclass
+class ManagedModel:
+    """A model the manager may unload when it has not been used for a while"""
+    name: str
+    is_loaded: Callable[[], bool]
+    load: Callable[[], Any]
+    unload: Optional[Callable[[float], Any]] = None  # None keeps the model resident
+    last_used: Callable[[], float] = None  # Monotonic time of the last use
+    idle_seconds: float = 0  # 0 never unloads
+    rss_mb: Optional[float] = None  # Resident memory measured on the last load or unload
+    loads: int = 0
+    unloads: int = 0
+    touched: float = field(default_factory=time.monotonic)  # Registered or last loaded
+
+    def idle_for(self) -> float:
+        """Seconds since the model was last used, registered or reloaded"""
+        used = self.last_used() if self.last_used else 0.0
+        return time.monotonic() - max(used or 0.0, self.touched)
+
+
+class ModelManager:
+    """Tracks model use, evicts idle models and reloads them before they are needed
+
+    Components keep their own ``last_used`` timestamps; the manager polls them
+    every ``check_interval`` seconds and unloads any model idle for longer than
+    its ``idle_seconds``. ``prefetch()`` (called when a wake word fires) reloads
+    evicted models in the background so the command that follows does not pay
+    the whole load time. Loads and unloads run one at a time so the process RSS
+    difference around each can be attributed to that model.
+
+    ``unload(idle_seconds)`` must check again, where it runs, that the model
+    was not used within idle_seconds (a request may have slipped in after the
+    idle check) and return False if it kept the model.
+    """
+
+    def __init__(self, check_interval: float = 30):
+        self.check_interval = check_interval
+        self.models: Dict[str, ManagedModel] = {}
+        self._lock = threading.Lock()  # One load/unload at a time
+        self.task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, is_loaded: Callable[[], bool], load: Callable[[], Any],
+                 unload: Optional[Callable[[float], Any]] = None,
+                 last_used: Callable[[], float] = None, idle_seconds: float = 0):
+        """Put a model under management"""
+        self.models[name] = ManagedModel(name, is_loaded, load, unload, last_used, idle_seconds)
+
+    def start(self) -> asyncio.Task:
+        """Start the idle check loop"""
+        self.task = asyncio.create_task(self._run())
+        return self.task
+
+    def stop(self):
+        """Stop the idle check loop"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self):
+        """Periodically evict idle models"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.check_interval)
+            for model in list(self.models.values()):
+                if self._should_evict(model):
+                    await loop.run_in_executor(None, self._unload, model)
+
+    def _should_evict(self, model: ManagedModel) -> bool:
+        return (model.unload is not None and model.idle_seconds > 0
+                and model.is_loaded() and model.idle_for() >= model.idle_seconds)
+
+    def _unload(self, model: ManagedModel):
+        """Unload one model and measure the memory returned"""
+        with self._lock:
+            # It may have been used while waiting for the lock
+            if not self._should_evict(model):
+                return
+            before, _ = process_rss_mb()
+            try:
+                if model.unload(model.idle_seconds) is False:
+                    logger.debug(f"{model.name} was used meanwhile, keeping it loaded")
+                    return
+            except Exception as e:
+                logger.error(f"Failed to unload {model.name}: {e}")
+                return
+            release_memory()
+            after, _ = process_rss_mb()
+
+            model.unloads += 1
+            model.rss_mb = round(max(0.0, before - after), 1)
+            logger.info(f"💤 Unloaded {model.name} after {model.idle_for():.0f}s idle "
+                        f"(freed {model.rss_mb} MB, RSS now {after:.0f} MB)")
+
+    def _load(self, model: ManagedModel):
+        """Load one model if it is not resident and measure its footprint"""
+        with self._lock:
+            if model.is_loaded():
+                return
+            before, _ = process_rss_mb()
+            start = time.perf_counter()
+            try:
+                model.load()
+            except Exception as e:
+                logger.error(f"Failed to reload {model.name}: {e}")
+                return
+            if not model.is_loaded():
+                return
+            after, _ = process_rss_mb()
+
+            model.loads += 1
+            model.touched = time.monotonic()
+            model.rss_mb = round(max(0.0, after - before), 1)
+            logger.info(f"📥 Reloaded {model.name} in {time.perf_counter() - start:.1f}s "
+                        f"(+{model.rss_mb} MB)")
+
+    def prefetch(self):
+        """Reload evicted models in the background (e.g. on wake word)"""
+        evicted = [m for m in self.models.values() if m.unloads and not m.is_loaded()]
+        if not evicted:
+            return
+
+        def reload_all():
+            for model in evicted:
+                self._load(model)
+
+        asyncio.get_running_loop().run_in_executor(None, reload_all)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-model residency and memory, plus the process RSS"""
+        rss_mb, peak_rss_mb = process_rss_mb()
+        return {
+            "rss_mb": round(rss_mb, 1),
+            "peak_rss_mb": round(peak_rss_mb, 1),
+            "check_interval": self.check_interval,
+            "models": {
+                model.name: {
+                    "loaded": model.is_loaded(),
+                    "idle_s": round(model.idle_for()),
+                    "idle_unload_s": model.idle_seconds if model.unload else None,
+                    "rss_mb": model.rss_mb,
+                    "loads": model.loads,
+                    "unloads": model.unloads
+                }
+                for model in self.models.values()
+            }
+        }
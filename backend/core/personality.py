@@ -163,6 +163,10 @@ class Personality:
         else:
             return f"Done! {result_text}"
     
+    def get_templates(self) -> List[str]:
+        """Every fixed response of the active personality"""
+        return [text for templates in self.response_templates.values() for text in templates]
+    
     def get_wake_response(self) -> str:
         """Get response when wake word is detected"""
         return self.get_response("greeting")
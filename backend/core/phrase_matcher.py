@@ -0,0 +1,125 @@
+"""
+Phrase Matcher (v1.1)
+Token-level Aho-Corasick matcher for large wake phrase sets
+"""
+from dataclasses import dataclass
+from collections import deque
+from typing import Dict, List, Optional, Iterable, Iterator, Union, Tuple
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class PhraseMatch:
+    """A phrase found in a token sequence"""
+    phrase: str
+    tag: Optional[str]  # Phrase set the phrase came from (e.g. "user:alice")
+    start: int  # Index of the first matched token
+    end: int  # Index of the last matched token (inclusive)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return text.lower().split()
+
+
+class PhraseMatcher:
+    """Matches whole-word phrases in a token stream
+
+    Phrases are compiled once into an Aho-Corasick automaton over tokens, so
+    a search costs one pass over the tokens however many phrases there are,
+    and "computer" never matches inside "computerized".
+    """
+
+    def __init__(self, phrases: Iterable[Union[str, Tuple[str, Optional[str]]]] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[Tuple[str, Optional[str], int]]] = [None]
+        self._dict_link: List[int] = [-1]  # Nearest suffix state with an output
+        self._compiled = False
+        self.size = 0
+
+        for item in phrases:
+            if isinstance(item, str):
+                self.add(item)
+            else:
+                self.add(*item)
+        self.compile()
+
+    def add(self, phrase: str, tag: Optional[str] = None):
+        """Add a phrase (call compile() before searching)"""
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._dict_link.append(-1)
+            state = next_state
+
+        if self._output[state] is None:
+            self._output[state] = (" ".join(tokens), tag, len(tokens))
+            self.size += 1
+        else:
+            logger.debug(f"Duplicate wake phrase ignored: '{phrase}' ({tag})")
+        self._compiled = False
+
+    def compile(self):
+        """Build failure and dictionary links (breadth-first)"""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            self._dict_link[state] = -1
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target
+
+                suffix = self._fail[child]
+                self._dict_link[child] = suffix if self._output[suffix] else self._dict_link[suffix]
+
+        self._compiled = True
+
+    def search(self, tokens: Union[str, List[str]]) -> Iterator[PhraseMatch]:
+        """Yield every match, ordered by end position (longest first on ties)"""
+        if not self._compiled:
+            self.compile()
+        if isinstance(tokens, str):
+            tokens = tokenize(tokens)
+
+        state = 0
+        for position, token in enumerate(tokens):
+            token = token.lower()
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+
+            match_state = state if self._output[state] else self._dict_link[state]
+            while match_state > 0:
+                phrase, tag, length = self._output[match_state]
+                yield PhraseMatch(phrase, tag, position - length + 1, position)
+                match_state = self._dict_link[match_state]
+
+    def find_first(self, tokens: Union[str, List[str]]) -> Optional[PhraseMatch]:
+        """The earliest-ending match, or None"""
+        return next(self.search(tokens), None)
+
+    def phrases(self) -> List[str]:
+        """All compiled phrases"""
+        return [output[0] for output in self._output if output]
@@ -123,6 +123,15 @@ class SkillManager:
             for skill in self.skills.values()
         ]
     
+    def get_triggers(self) -> List[str]:
+        """Trigger phrases of all enabled skills"""
+        return [
+            trigger
+            for skill in self.skills.values()
+            if skill.metadata.enabled
+            for trigger in skill.metadata.triggers
+        ]
+    
     def get_skill(self, name: str) -> Optional[Skill]:
         """Get a skill by name"""
         return self.skills.get(name)
@@ -3,138 +3,468 @@ Speech Processor Module (v0.2)
 Handles voice recording and speech-to-text using Whisper
 """
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
 import wave
-import tempfile
-import pyaudio
-import whisper
 import numpy as np
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Any, List
 from utils.logger import setup_logger
+from core.audio_capture import AudioBus
+from core.stt_backend import STTBackend, create_stt_backend, build_vocabulary_prompt, apply_cpu_affinity
+from core.audio_preprocess import AudioPreprocessor
+from core.batch_scheduler import BatchScheduler
+from core.stt_service import STTService, PRIORITY_COMMAND, PRIORITY_PARTIAL
+from core.vad import EnergyVAD
+from core.websocket_manager import ConnectionManager
 
 logger = setup_logger(__name__)
 
 
+@dataclass
+class Recording:
+    """A captured command utterance"""
+    audio: np.ndarray  # float32 samples in [-1, 1] at 16 kHz
+    endpoint_reason: str  # "silence", "max_duration", "no_speech" or "stream_ended"
+    utterance_ms: int  # From first to last voiced frame
+    recorded_ms: int  # Total audio captured
+    speech_end: int = 0  # Sample offset where the last voiced frame ended
+    text: Optional[str] = None
+    stt_tier: Optional[str] = None  # "vosk" or "whisper"
+    
+    @property
+    def has_speech(self) -> bool:
+        return self.endpoint_reason != "no_speech" and self.utterance_ms > 0
+    
+    def endpoint_info(self) -> Dict[str, Any]:
+        """Endpointing summary for the overlay"""
+        return {
+            "reason": self.endpoint_reason,
+            "utterance_ms": self.utterance_ms,
+            "recorded_ms": self.recorded_ms
+        }
+
+
+class StreamingTranscriber:
+    """Decodes a recording while it is still being captured
+    
+    The recorder calls update() after every frame. Whenever the decoder is
+    idle and enough new audio has arrived, the most recent window is decoded
+    in the background and broadcast as a partial_transcript. finalize()
+    reuses the last partial when it already covered all the speech, so the
+    final decode usually overlaps with the trailing silence.
+    """
+    
+    def __init__(self, processor: "SpeechProcessor", interval_ms: int = 800,
+                 window_seconds: float = 10.0):
+        self.processor = processor
+        self.interval = int(processor.SAMPLE_RATE * interval_ms / 1000)
+        self.window = int(processor.SAMPLE_RATE * window_seconds)
+        
+        self._task: Optional[asyncio.Task] = None
+        self._decoded_end = 0  # Sample position covered by the last partial
+        self._decoded_text: Optional[str] = None
+        self.partials = 0
+    
+    def update(self, samples: np.ndarray, filled: int, speech_start: Optional[int], speech_end: int):
+        """Start a partial decode if the decoder is idle and there is new speech"""
+        if speech_start is None or (self._task and not self._task.done()):
+            return
+        # Decode every interval, and straight away when the speaker pauses so
+        # the final transcript is usually ready before endpointing fires
+        paused = filled > speech_end > self._decoded_end
+        if filled - self._decoded_end < self.interval and not paused:
+            return
+        
+        # The prefix of the buffer is never rewritten, so a view is safe here
+        window = samples[max(0, filled - self.window):filled]
+        self._task = asyncio.create_task(self._decode_partial(window, filled))
+    
+    async def _decode_partial(self, window: np.ndarray, end: int):
+        """Decode one window and broadcast the partial transcript"""
+        audio = window.astype(np.float32)
+        audio *= 1.0 / 32768.0
+        
+        text = await self.processor.transcribe_audio(audio, partial=True)
+        if text is None:
+            return
+        
+        self._decoded_end = end
+        self._decoded_text = text
+        self.partials += 1
+        
+        await self.processor.ws_manager.broadcast({
+            "type": "partial_transcript",
+            "text": text,
+            "audio_ms": end * 1000 // self.processor.SAMPLE_RATE
+        })
+    
+    def cancel(self):
+        """Drop any partial decode still running"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+    
+    async def finalize(self, recording: Recording, audio: np.ndarray = None) -> Optional[str]:
+        """Final transcript, reusing the last partial if it covered all speech
+        
+        audio, if given, replaces recording.audio for a fresh decode (e.g. a
+        preprocessed copy).
+        """
+        if self._task:
+            await self._task
+        
+        if self._decoded_text is not None and self._decoded_end >= recording.speech_end \
+                and len(recording.audio) <= self.window:
+            logger.info(f"📝 Transcribed (streamed): '{self._decoded_text}'")
+            return self._decoded_text
+        
+        return await self.processor.transcribe_audio(recording.audio if audio is None else audio)
+
+
 class SpeechProcessor:
     """Records audio and transcribes using Whisper"""
     
     SAMPLE_RATE = 16000
-    CHUNK_SIZE = 1024
     CHANNELS = 1
     RECORD_SECONDS = 5
     
-    def __init__(self):
-        self.audio = None
-        self.stream = None
-        self.model = None
+    # Endpointing defaults
+    TRAILING_SILENCE_MS = 700
+    MAX_RECORD_SECONDS = 10
+    NO_SPEECH_TIMEOUT = 3.0
+    
+    def __init__(self, audio_bus: AudioBus = None, model_size: str = "base",
+                 debug_dump_audio: bool = False, endpointing: Dict[str, Any] = None,
+                 vad_config: Dict[str, Any] = None, streaming: Dict[str, Any] = None,
+                 stt_service: STTService = None, stt_engine: str = "whisper",
+                 engine_options: Dict[str, Any] = None, decode_profile: Dict[str, Any] = None,
+                 batching: Dict[str, Any] = None, preprocess: Dict[str, Any] = None,
+                 cpu_options: Dict[str, Any] = None):
+        self.audio_bus = audio_bus or AudioBus()
+        self.stt_service = stt_service  # Out-of-process Whisper workers, if enabled
+        self.fast_path = None  # VoskFastPath tried before Whisper, if enabled
+        self.ws_manager = ConnectionManager()
+        self.model_size = model_size
+        self.debug_dump_audio = debug_dump_audio
+        
+        endpointing = endpointing or {}
+        self.endpointing_enabled = endpointing.get("enabled", True)
+        self.trailing_silence_ms = endpointing.get("trailing_silence_ms", self.TRAILING_SILENCE_MS)
+        self.max_record_seconds = endpointing.get("max_duration", self.MAX_RECORD_SECONDS)
+        self.no_speech_timeout = endpointing.get("no_speech_timeout", self.NO_SPEECH_TIMEOUT)
+        self.vad_config = vad_config or {}
+        
+        # Trim / normalize / no-speech check before STT
+        preprocess = preprocess or {}
+        self.preprocessor: Optional[AudioPreprocessor] = None
+        if preprocess.get("enabled", True):
+            self.preprocessor = AudioPreprocessor(
+                speech_threshold=preprocess.get("speech_threshold", 0.01),
+                frame_ms=preprocess.get("frame_ms", 20),
+                margin_ms=preprocess.get("margin_ms", 200),
+                target_peak=preprocess.get("target_peak", 0.9),
+                max_gain=preprocess.get("max_gain", 10.0)
+            )
+        
+        streaming = streaming or {}
+        self.streaming_enabled = streaming.get("enabled", True)
+        self.stream_interval_ms = streaming.get("interval_ms", 800)
+        self.stream_window_seconds = streaming.get("window_seconds", 10.0)
+        
+        # Speech-to-text engine (voice.stt_engine), loaded lazily
+        self.decode_profile = decode_profile or {}
+        self.initial_prompt: Optional[str] = None  # Command vocabulary, see set_vocabulary()
+        self.cpu_options = cpu_options or {}  # voice.stt_cpu: threads, affinity, int8
+        self.backend: STTBackend = create_stt_backend(stt_engine, model_size, engine_options,
+                                                      threads=self.decode_profile.get("threads", 0),
+                                                      cpu_options=self.cpu_options)
         self.model_loaded = False
+        self.rtf: Optional[float] = None  # Startup self-benchmark
+        self.last_used = time.monotonic()  # For idle unloading (core.model_manager)
+        self._load_lock = threading.Lock()
         
-    def load_model(self, model_size: str = "base"):
-        """Load Whisper model (lazy loading)"""
-        if self.model_loaded:
-            return
+        # In-process STT runs on one thread, optionally pinned to chosen cores
+        # (torch's worker threads inherit the pinning when they are created)
+        self._stt_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="nuxai-stt",
+            initializer=apply_cpu_affinity,
+            initargs=(self.cpu_options.get("cpu_affinity"),)
+        )
+        
+        # Group concurrent in-process decodes (the worker pool batches on its own)
+        batching = batching or {}
+        self.batcher: Optional[BatchScheduler] = None
+        if batching.get("enabled", False) and not stt_service:
+            self.batcher = BatchScheduler(
+                lambda audios, options: self.backend.transcribe_batch(audios, **options),
+                max_batch_size=batching.get("max_batch_size", 4),
+                max_wait_ms=batching.get("max_wait_ms", 30),
+                executor=self._stt_executor
+            )
+        
+    def load_model(self):
+        """Load the STT model (lazy loading, safe to call from several threads)"""
+        with self._load_lock:
+            if self.model_loaded:
+                return
             
-        try:
-            logger.info(f"📥 Loading Whisper model ({model_size})...")
-            self.model = whisper.load_model(model_size)
-            self.model_loaded = True
-            logger.info("✅ Whisper model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load Whisper model: {e}")
-            logger.info("💡 Fallback: Using simple text simulation")
+            try:
+                logger.info(f"📥 Loading {self.backend.name} model ({self.model_size})...")
+                try:
+                    self.backend.load()
+                except ImportError as e:
+                    if self.backend.name == "whisper":
+                        raise
+                    logger.warning(f"{self.backend.name} not installed ({e}), falling back to whisper")
+                    self.backend = create_stt_backend("whisper", self.model_size,
+                                                      threads=self.backend.threads,
+                                                      cpu_options=self.cpu_options)
+                    self.backend.load()
+                self.model_loaded = True
+                logger.info(f"✅ {self.backend.name} model loaded successfully")
+            except Exception as e:
+                logger.error(f"Failed to load Whisper model: {e}")
+                logger.info("💡 Fallback: Using simple text simulation")
+    
+    def preload(self) -> bool:
+        """Load the model on the STT thread (blocking)"""
+        self._stt_executor.submit(self.load_model).result()
+        return self.model_loaded
+    
+    def unload_model(self, idle_seconds: float = 0) -> bool:
+        """Release the in-process model; the next transcription reloads it
+        
+        Returns False if it was used within idle_seconds after all.
+        """
+        # On the STT thread, so it cannot pull the model from under a decode
+        return self._stt_executor.submit(self._unload_model, idle_seconds).result()
+    
+    def _unload_model(self, idle_seconds: float) -> bool:
+        with self._load_lock:
+            # A decode queued ahead of this one has just run
+            if time.monotonic() - self.last_used < idle_seconds:
+                return False
+            self.backend.unload()
+            self.model_loaded = False
+            return True
+    
+    def set_vocabulary(self, phrases: List[str]):
+        """Bias decoding toward known commands with an initial prompt"""
+        self.initial_prompt = build_vocabulary_prompt(phrases)
+        if self.initial_prompt:
+            logger.info(f"📖 STT vocabulary prompt: {len(self.initial_prompt)} chars")
+    
+    def decode_options(self) -> Dict[str, Any]:
+        """transcribe() options for the configured decode profile"""
+        return self.backend.decode_options(self.decode_profile, self.initial_prompt)
     
-    async def record_audio(self, duration: float = None) -> Optional[str]:
-        """Record audio and save to temporary file"""
-        duration = duration or self.RECORD_SECONDS
+    @property
+    def stt_ready(self) -> bool:
+        """True when a transcription would not have to load a model first"""
+        return self.stt_service.ready if self.stt_service else self.model_loaded
+    
+    def warmup(self) -> bool:
+        """Load the model and run one dummy inference to allocate buffers"""
+        if self.stt_service:
+            # Workers load their own models; wait for the first one
+            return self.stt_service.wait_ready(timeout=300)
+        
+        return self._stt_executor.submit(self._warmup).result()
+    
+    def _warmup(self) -> bool:
+        """Warm up on the STT thread so torch's thread pool starts there"""
+        self.load_model()
+        if not self.model_loaded:
+            return False
+        
+        self.backend.warmup()
+        if self.cpu_options.get("self_benchmark", True):
+            self.rtf = self.backend.measure_rtf(**self.decode_options())
+            logger.info(f"⏱️ {self.backend.name} real-time factor: {self.rtf:.2f} "
+                        f"({'faster' if self.rtf < 1 else 'slower'} than real time)")
+        return True
+    
+    async def record_audio(self, duration: float = None, start_position: int = None) -> Optional[np.ndarray]:
+        """Record a fixed-length window from the shared audio bus into memory
+        
+        Args:
+            duration: Seconds of audio to record
+            start_position: Audio bus sample position to start from. Audio
+                already buffered from that point is used before live audio.
+        
+        Returns:
+            float32 samples in [-1, 1] at 16 kHz, ready for Whisper
+        """
+        recording = await self.record_utterance(start_position, duration or self.RECORD_SECONDS,
+                                                endpointing=False)
+        return recording.audio if recording else None
+    
+    async def record_utterance(self, start_position: int = None, max_duration: float = None,
+                               endpointing: bool = True,
+                               stream: Optional[StreamingTranscriber] = None) -> Optional[Recording]:
+        """Record until the speaker stops (VAD endpointing)
+        
+        Stops after trailing_silence_ms of silence following speech, after
+        no_speech_timeout seconds without any speech, or at max_duration.
+        
+        Args:
+            start_position: Audio bus sample position to start from
+            max_duration: Hard cap in seconds
+            endpointing: False records the full max_duration window
+            stream: Decodes partial transcripts while recording
+        """
+        max_duration = max_duration or self.max_record_seconds
+        subscription = None
         
         try:
-            logger.info(f"🎤 Recording audio for {duration} seconds...")
+            logger.info(f"🎤 Recording audio (up to {max_duration} seconds)...")
             
-            # Initialize PyAudio
-            self.audio = pyaudio.PyAudio()
+            # Reuse the long-lived microphone stream instead of reopening it
+            await self.audio_bus.start()
+            subscription = self.audio_bus.subscribe("command_recorder", start_position)
             
-            # Open stream
-            self.stream = self.audio.open(
-                format=pyaudio.paInt16,
-                channels=self.CHANNELS,
-                rate=self.SAMPLE_RATE,
-                input=True,
-                frames_per_buffer=self.CHUNK_SIZE
+            vad = EnergyVAD(
+                energy_threshold=self.vad_config.get("energy_threshold", 0.01),
+                max_zcr=self.vad_config.get("max_zcr", 0.35)
             )
+            silence_limit = int(self.SAMPLE_RATE * self.trailing_silence_ms / 1000)
+            no_speech_limit = int(self.SAMPLE_RATE * self.no_speech_timeout)
+            speech_start = None
+            speech_end = 0
+            reason = "max_duration"
             
-            frames = []
-            num_chunks = int(self.SAMPLE_RATE / self.CHUNK_SIZE * duration)
+            # Frames are copied straight out of the ring into one preallocated buffer
+            samples = np.empty(int(self.SAMPLE_RATE * max_duration), dtype=np.int16)
+            filled = 0
             
             # Record audio
-            for _ in range(num_chunks):
-                data = self.stream.read(self.CHUNK_SIZE, exception_on_overflow=False)
-                frames.append(data)
-                await asyncio.sleep(0.001)  # Allow other tasks to run
+            while filled < len(samples):
+                frame = await subscription.read()
+                if frame is None:
+                    reason = "stream_ended"
+                    break
+                count = min(len(frame), len(samples) - filled)
+                chunk = frame[:count]
+                samples[filled:filled + count] = chunk
+                filled += count
+                
+                if vad.is_speech(chunk):
+                    if speech_start is None:
+                        speech_start = filled - count
+                    speech_end = filled
+                
+                if stream:
+                    stream.update(samples, filled, speech_start, speech_end)
+                
+                if not endpointing:
+                    continue
+                if speech_start is None:
+                    if filled >= no_speech_limit:
+                        reason = "no_speech"
+                        break
+                elif filled - speech_end >= silence_limit:
+                    reason = "silence"
+                    break
             
-            # Stop recording
-            self.stream.stop_stream()
-            self.stream.close()
-            self.audio.terminate()
+            samples = samples[:filled]
+            utterance_ms = 0 if speech_start is None else (speech_end - speech_start) * 1000 // self.SAMPLE_RATE
+            recorded_ms = filled * 1000 // self.SAMPLE_RATE
+            logger.info(f"✅ Audio recorded: {recorded_ms} ms (endpoint: {reason}, speech: {utterance_ms} ms)")
             
-            # Save to temporary file
-            temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-            temp_path = temp_file.name
-            temp_file.close()
+            if self.debug_dump_audio:
+                self._dump_audio(samples)
             
-            with wave.open(temp_path, 'wb') as wf:
-                wf.setnchannels(self.CHANNELS)
-                wf.setsampwidth(self.audio.get_sample_size(pyaudio.paInt16))
-                wf.setframerate(self.SAMPLE_RATE)
-                wf.writeframes(b''.join(frames))
-            
-            logger.info(f"✅ Audio recorded: {temp_path}")
-            return temp_path
+            # Single int16 -> float32 conversion, scaled in place
+            audio = samples.astype(np.float32)
+            audio *= 1.0 / 32768.0
+            return Recording(audio, reason, utterance_ms, recorded_ms, speech_end)
             
         except Exception as e:
             logger.error(f"Error recording audio: {e}")
             return None
         finally:
-            if self.stream:
-                self.stream.stop_stream()
-                self.stream.close()
-            if self.audio:
-                self.audio.terminate()
-    
-    async def transcribe_audio(self, audio_path: str) -> Optional[str]:
-        """Transcribe audio file using Whisper"""
+            if subscription:
+                subscription.close()
+    
+    def _dump_audio(self, samples: np.ndarray):
+        """Write a recording to logs/audio for debugging"""
+        try:
+            dump_dir = Path("logs") / "audio"
+            dump_dir.mkdir(parents=True, exist_ok=True)
+            dump_path = dump_dir / f"command-{time.strftime('%Y%m%d-%H%M%S')}.wav"
+            
+            with wave.open(str(dump_path), 'wb') as wf:
+                wf.setnchannels(self.CHANNELS)
+                wf.setsampwidth(self.audio_bus.SAMPLE_WIDTH)
+                wf.setframerate(self.SAMPLE_RATE)
+                wf.writeframes(samples.tobytes())
+            
+            logger.debug(f"Audio dumped to {dump_path}")
+        except Exception as e:
+            logger.error(f"Error dumping audio: {e}")
+    
+    async def transcribe_audio(self, audio: np.ndarray, partial: bool = False) -> Optional[str]:
+        """Transcribe float32 16 kHz audio with the STT backend (no temp files or ffmpeg)
+        
+        Args:
+            audio: Samples to decode
+            partial: Intermediate decode of a recording in progress (quieter logging)
+        """
+        if self.stt_service:
+            return await self._transcribe_service(audio, partial)
+        
+        loop = asyncio.get_event_loop()
+        self.last_used = time.monotonic()
+        
         if not self.model_loaded:
-            self.load_model()
+            await loop.run_in_executor(self._stt_executor, self.load_model)
         
-        if not self.model:
+        if not self.model_loaded:
+            if partial:
+                return None
             # Fallback for testing without model
             logger.warning("Whisper model not available, using fallback")
             return await self._fallback_transcribe()
         
         try:
-            logger.info("🔄 Transcribing audio with Whisper...")
+            if not partial:
+                logger.info(f"🔄 Transcribing audio with {self.backend.name}...")
             
             # Run transcription in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: self.model.transcribe(audio_path, language="en")
-            )
-            
-            text = result["text"].strip()
-            logger.info(f"📝 Transcribed: '{text}'")
-            
-            # Clean up temp file
-            try:
-                Path(audio_path).unlink()
-            except:
-                pass
-            
+            options = self.decode_options()
+            if self.batcher:
+                text = await self.batcher.transcribe(audio, options)
+            else:
+                text = await loop.run_in_executor(self._stt_executor,
+                                                  lambda: self.backend.transcribe(audio, **options))
+            if partial:
+                logger.debug(f"Partial transcript: '{text}'")
+            else:
+                logger.info(f"📝 Transcribed: '{text}'")
             return text
             
         except Exception as e:
             logger.error(f"Error transcribing audio: {e}")
             return None
     
+    async def _transcribe_service(self, audio: np.ndarray, partial: bool) -> Optional[str]:
+        """Transcribe on the STT worker pool (partials queue behind commands)"""
+        if not partial:
+            logger.info("🔄 Transcribing audio with Whisper (worker pool)...")
+        
+        priority = PRIORITY_PARTIAL if partial else PRIORITY_COMMAND
+        text = await self.stt_service.transcribe(audio, priority=priority, options=self.decode_options())
+        
+        if text is not None:
+            if partial:
+                logger.debug(f"Partial transcript: '{text}'")
+            else:
+                logger.info(f"📝 Transcribed: '{text}'")
+        return text
+    
     async def _fallback_transcribe(self) -> str:
         """Fallback transcription for testing"""
         # Simulate processing time
@@ -151,12 +481,59 @@ class SpeechProcessor:
         import random
         return random.choice(demo_commands)
     
-    async def record_and_transcribe(self, duration: float = None) -> Optional[str]:
-        """Record audio and transcribe in one call"""
-        audio_path = await self.record_audio(duration)
+    async def capture_command(self, start_position: int = None, duration: float = None) -> Optional[Recording]:
+        """Record a command and transcribe it
+        
+        With endpointing enabled, duration is the maximum length; otherwise
+        a fixed window of that length is recorded. Transcription is skipped
+        when no speech was heard.
+        """
+        stream = None
+        if self.streaming_enabled and self.stt_ready:
+            stream = StreamingTranscriber(self, self.stream_interval_ms, self.stream_window_seconds)
+        
+        if self.endpointing_enabled:
+            recording = await self.record_utterance(start_position, self.max_record_seconds,
+                                                    stream=stream)
+        else:
+            recording = await self.record_utterance(start_position, duration or self.RECORD_SECONDS,
+                                                    endpointing=False, stream=stream)
         
-        if not audio_path:
+        if recording is None:
             return None
         
-        return await self.transcribe_audio(audio_path)
-
+        if recording.has_speech or not self.endpointing_enabled:
+            audio = recording.audio
+            if self.preprocessor:
+                prepared = self.preprocessor.process(audio)
+                if not prepared.has_speech:
+                    logger.info("🔇 No speech energy in recording, skipping STT")
+                    if stream:
+                        stream.cancel()
+                    return recording
+                audio = prepared.audio
+                logger.debug(f"Preprocessed: trimmed {prepared.trimmed_ms} ms, gain {prepared.gain}, "
+                             f"steps {prepared.timings_ms}")
+            
+            if self.fast_path:
+                recording.text = await self.fast_path.transcribe(audio)
+                if recording.text is not None:
+                    recording.stt_tier = "vosk"
+                    if stream:
+                        stream.cancel()
+                    return recording
+            
+            start = time.perf_counter()
+            if stream:
+                recording.text = await stream.finalize(recording, audio)
+            else:
+                recording.text = await self.transcribe_audio(audio)
+            recording.stt_tier = "whisper"
+            if self.fast_path:
+                self.fast_path.record_whisper((time.perf_counter() - start) * 1000)
+        return recording
+    
+    async def record_and_transcribe(self, duration: float = None, start_position: int = None) -> Optional[str]:
+        """Record audio and transcribe in one call"""
+        recording = await self.capture_command(start_position, duration)
+        return recording.text if recording else None
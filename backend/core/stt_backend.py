@@ -0,0 +1,298 @@
+"""
+STT Backends (v1.1)
+Pluggable speech-to-text engines behind one interface
+"""
+import os
+import time
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Iterable, Optional, List
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Decoding presets (voice.decode_profiles overrides these). Short commands
+# gain little from beam search, timestamps or conditioning on earlier text.
+DECODE_PROFILES = {
+    "fast": {
+        "beam_size": 1,
+        "best_of": 1,
+        "temperature": [0.0],
+        "without_timestamps": True,
+        "condition_on_previous_text": False,
+        "threads": 0
+    },
+    "balanced": {
+        "beam_size": 1,
+        "best_of": 3,
+        "temperature": [0.0, 0.4, 0.8],
+        "without_timestamps": True,
+        "condition_on_previous_text": False,
+        "threads": 0
+    },
+    "accurate": {
+        "beam_size": 5,
+        "best_of": 5,
+        "temperature": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+        "without_timestamps": False,
+        "condition_on_previous_text": True,
+        "threads": 0
+    }
+}
+
+PROMPT_MAX_CHARS = 600  # Whisper keeps at most 224 prompt tokens
+
+
+def resolve_decode_profile(name: str, profiles: Dict[str, Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Look up a decode profile in config, then the built-in presets"""
+    profile = (profiles or {}).get(name) or DECODE_PROFILES.get(name)
+    if profile is None:
+        logger.warning(f"Unknown decode profile '{name}', using balanced")
+        profile = DECODE_PROFILES["balanced"]
+    return dict(profile)
+
+
+def build_vocabulary_prompt(phrases: Iterable[str], max_chars: int = PROMPT_MAX_CHARS) -> Optional[str]:
+    """Initial prompt listing known commands, to bias decoding toward them"""
+    seen = set()
+    prompt = "Voice commands:"
+    for phrase in phrases:
+        phrase = phrase.strip().lower()
+        if not phrase or phrase in seen:
+            continue
+        if len(prompt) + len(phrase) + 2 > max_chars:
+            break
+        seen.add(phrase)
+        prompt += (" " if len(seen) == 1 else ", ") + phrase
+    return prompt + "." if seen else None
+
+
+def apply_cpu_affinity(cores: List[int]) -> bool:
+    """Pin the calling thread (and threads it starts later) to the given cores"""
+    if not cores:
+        return False
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("CPU affinity is not supported on this platform")
+        return False
+    try:
+        os.sched_setaffinity(0, cores)
+        return True
+    except OSError as e:
+        logger.warning(f"Could not pin STT to cores {cores}: {e}")
+        return False
+
+
+def configure_torch_threads(threads: int = 0, interop_threads: int = 0):
+    """Set PyTorch intra-op and inter-op thread counts (0 = leave default)"""
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # Only allowed before any inter-op parallel work has started
+            logger.warning(f"Could not set torch inter-op threads: {e}")
+
+
+def quantize_whisper_int8(model):
+    """Dynamic int8 quantization of a CPU Whisper model's linear layers"""
+    import torch
+    import whisper
+
+    # whisper.model.Linear only adds dtype casting, which does not apply to
+    # CPU float32; quantize_dynamic only swaps plain nn.Linear modules
+    for module in model.modules():
+        if isinstance(module, whisper.model.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class STTBackend(ABC):
+    """Base class for speech-to-text engines
+
+    Backends take float32 16 kHz mono audio and return the transcript.
+    """
+
+    name = "base"
+
+    def __init__(self, model_size: str = "base", threads: int = 0):
+        self.model_size = model_size
+        self.threads = threads  # 0 = library default
+        self.model = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.model is not None
+
+    @abstractmethod
+    def load(self):
+        """Load the model (blocking)"""
+        pass
+
+    def unload(self):
+        """Drop the model so its memory can be freed"""
+        self.model = None
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray, **options) -> str:
+        """Transcribe audio (blocking)"""
+        pass
+
+    def transcribe_batch(self, audios: List[np.ndarray], **options) -> List[str]:
+        """Transcribe several utterances (backends override this to batch)"""
+        return [self.transcribe(audio, **dict(options)) for audio in audios]
+
+    def decode_options(self, profile: Dict[str, Any], initial_prompt: str = None) -> Dict[str, Any]:
+        """Translate a decode profile into transcribe() keyword arguments"""
+        options = {
+            "beam_size": profile.get("beam_size", 1),
+            "best_of": profile.get("best_of", 1),
+            "temperature": tuple(profile.get("temperature", [0.0])),
+            "without_timestamps": profile.get("without_timestamps", True),
+            "condition_on_previous_text": profile.get("condition_on_previous_text", False)
+        }
+        if initial_prompt:
+            options["initial_prompt"] = initial_prompt
+        return options
+
+    def warmup(self):
+        """Run one dummy inference to allocate buffers"""
+        self.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+    def measure_rtf(self, seconds: float = 5.0, **options) -> float:
+        """Real-time factor (decode time / audio time) on low-level noise"""
+        audio = np.random.default_rng(0).normal(0, 0.003, int(SAMPLE_RATE * seconds)).astype(np.float32)
+        start = time.perf_counter()
+        self.transcribe(audio, **options)
+        return (time.perf_counter() - start) / seconds
+
+
+class WhisperBackend(STTBackend):
+    """openai-whisper on PyTorch, optionally with int8 dynamic quantization"""
+
+    name = "whisper"
+
+    def __init__(self, model_size: str = "base", threads: int = 0, interop_threads: int = 0,
+                 quantize_int8: bool = False):
+        super().__init__(model_size, threads)
+        self.interop_threads = interop_threads
+        self.quantize_int8 = quantize_int8
+
+    def load(self):
+        import whisper
+
+        configure_torch_threads(self.threads, self.interop_threads)
+        if self.quantize_int8:
+            # Quantized kernels are CPU-only
+            self.model = quantize_whisper_int8(whisper.load_model(self.model_size, device="cpu"))
+            logger.info("🗜️ Whisper linear layers quantized to int8")
+        else:
+            self.model = whisper.load_model(self.model_size)
+
+    def decode_options(self, profile: Dict[str, Any], initial_prompt: str = None) -> Dict[str, Any]:
+        options = super().decode_options(profile, initial_prompt)
+        # whisper decodes greedily only when beam_size is None
+        if options["beam_size"] <= 1:
+            options["beam_size"] = None
+        return options
+
+    def transcribe(self, audio: np.ndarray, **options) -> str:
+        options.setdefault("language", "en")
+        if self.model.device.type == "cpu":
+            options.setdefault("fp16", False)
+        return self.model.transcribe(audio, **options)["text"].strip()
+
+    def transcribe_batch(self, audios: List[np.ndarray], **options) -> List[str]:
+        """Encode and decode utterances as one batch of 30 s mel spectrograms
+
+        Uses a single decode pass at the profile's first temperature (no
+        fallback), so it suits short commands that fit one 30 s window.
+        """
+        if len(audios) == 1:
+            return [self.transcribe(audios[0], **options)]
+
+        import torch
+        import whisper
+
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), self.model.dims.n_mels)
+            for audio in audios
+        ]).to(self.model.device)
+
+        temperature = options.get("temperature", 0.0)
+        if isinstance(temperature, (list, tuple)):
+            temperature = temperature[0]
+        beam_size = options.get("beam_size")
+        decoding = whisper.DecodingOptions(
+            language=options.get("language", "en"),
+            temperature=temperature,
+            beam_size=beam_size if temperature == 0 else None,
+            best_of=options.get("best_of") if temperature > 0 else None,
+            without_timestamps=options.get("without_timestamps", True),
+            prompt=options.get("initial_prompt"),
+            fp16=self.model.device.type != "cpu"
+        )
+        return [result.text.strip() for result in whisper.decode(self.model, mel, decoding)]
+
+
+class FasterWhisperBackend(STTBackend):
+    """CTranslate2 Whisper (faster-whisper), int8 on CPU by default"""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_size: str = "base", threads: int = 0, compute_type: str = "int8",
+                 cpu_threads: int = 0, device: str = "cpu"):
+        super().__init__(model_size, threads)
+        self.compute_type = compute_type
+        self.cpu_threads = threads or cpu_threads
+        self.device = device
+
+    def load(self):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(
+            self.model_size,
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads
+        )
+
+    def transcribe(self, audio: np.ndarray, **options) -> str:
+        options.setdefault("language", "en")
+        segments, _ = self.model.transcribe(audio, **options)
+        # segments is a generator; decoding happens while it is consumed
+        return "".join(segment.text for segment in segments).strip()
+
+
+STT_BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def create_stt_backend(engine: str = "whisper", model_size: str = "base",
+                       engine_options: Dict[str, Any] = None, threads: int = 0,
+                       cpu_options: Dict[str, Any] = None) -> STTBackend:
+    """Create an STT backend by name (see ``voice.stt_engine``)
+
+    cpu_options is ``voice.stt_cpu``; its thread count applies when the
+    decode profile does not set one.
+    """
+    backend_class = STT_BACKENDS.get(engine)
+    if backend_class is None:
+        logger.warning(f"Unknown STT engine '{engine}', using whisper")
+        backend_class = WhisperBackend
+
+    cpu_options = cpu_options or {}
+    threads = threads or cpu_options.get("threads", 0)
+    if backend_class is FasterWhisperBackend:
+        return backend_class(model_size, threads, **(engine_options or {}))
+    return backend_class(
+        model_size,
+        threads,
+        interop_threads=cpu_options.get("interop_threads", 0),
+        quantize_int8=cpu_options.get("quantize_int8", False)
+    )
@@ -0,0 +1,549 @@
+"""
+STT Service (v1.1)
+Out-of-process speech-to-text worker pool with a bounded priority queue
+"""
+import asyncio
+import itertools
+import multiprocessing as mp
+import threading
+import time
+import numpy as np
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing import connection, shared_memory
+from typing import Optional, Dict, Any, List
+from utils.logger import setup_logger
+from core.benchmark import percentile
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Request priorities (lower runs first)
+PRIORITY_COMMAND = 0
+PRIORITY_PARTIAL = 1
+
+
+def _worker_main(worker_id: int, engine: str, model_size: str, engine_options: Dict[str, Any],
+                 threads: int, cpu_options: Dict[str, Any], shm_name: str, max_batch_size: int,
+                 max_samples: int, requests, results):
+    """Worker process: load the STT model once, then serve batches forever
+
+    Audio arrives through this worker's shared memory block, one row per
+    request in the batch; only sample counts and decode options go through
+    the request queue. Replies go back through this worker's own pipe, so a
+    worker killed mid-write cannot block the others.
+
+    ``("unload", idle_seconds)`` drops the model unless the worker decoded
+    something within idle_seconds; ``("load",)`` or the next request loads it
+    again. Both are answered with ``("model", worker_id, loaded)``.
+    """
+    from core.model_manager import release_memory
+    from core.stt_backend import apply_cpu_affinity, create_stt_backend
+
+    apply_cpu_affinity(cpu_options.get("cpu_affinity"))
+    try:
+        backend = create_stt_backend(engine, model_size, engine_options, threads, cpu_options)
+        try:
+            backend.load()
+        except ImportError:
+            if engine == "whisper":
+                raise
+            backend = create_stt_backend("whisper", model_size, None, threads, cpu_options)
+            backend.load()
+        backend.warmup()
+        rtf = backend.measure_rtf() if cpu_options.get("self_benchmark", True) else None
+    except Exception as e:
+        results.send(("failed", worker_id, str(e)))
+        return
+
+    block = shared_memory.SharedMemory(name=shm_name)
+    buffer = np.ndarray((max_batch_size, max_samples), dtype=np.float32, buffer=block.buf)
+    results.send(("ready", worker_id, rtf))
+    loaded, last_used = True, time.monotonic()
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+
+        if item[0] == "unload":
+            if loaded and time.monotonic() - last_used >= item[1]:
+                backend.unload()
+                release_memory()
+                loaded = False
+            results.send(("model", worker_id, loaded))
+            continue
+        if item[0] == "load":
+            if not loaded:
+                try:
+                    backend.load()
+                    loaded = True
+                except Exception:
+                    pass  # Retried by the next request, which reports the error
+            results.send(("model", worker_id, loaded))
+            continue
+
+        request_ids, lengths, options = item
+        last_used = time.monotonic()
+        audios = [buffer[row, :length] for row, length in enumerate(lengths)]
+        start = time.perf_counter()
+        try:
+            if not loaded:
+                backend.load()
+                loaded = True
+                results.send(("model", worker_id, loaded))
+            texts, error = backend.transcribe_batch(audios, **options), None
+        except Exception as e:
+            texts, error = [None] * len(request_ids), str(e)
+        del audios
+        results.send(("result", worker_id, request_ids, texts, time.perf_counter() - start, error))
+
+    del buffer
+    block.close()
+
+
+@dataclass
+class _Worker:
+    """Parent-side handle for one worker process"""
+    worker_id: int  # Unique per process, so messages from a dead one are recognized
+    slot: int  # Position in the pool, kept by a respawned worker
+    process: Any
+    requests: Any
+    block: shared_memory.SharedMemory
+    buffer: np.ndarray
+    ready: bool = False
+    loaded: bool = True  # Model resident (see unload_models)
+    failed: bool = False  # Could not load its model; never respawned
+    rtf: Optional[float] = None  # Startup self-benchmark
+    batch: List[int] = field(default_factory=list)  # Request ids being transcribed
+
+
+@dataclass
+class _Request:
+    """A queued transcription request"""
+    audio: np.ndarray
+    options: Dict[str, Any]
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class STTService:
+    """Runs speech-to-text in separate processes so inference never holds the server's GIL
+
+    Requests go through a bounded priority queue; a dispatcher hands the
+    next requests (up to ``max_batch_size`` arriving within ``max_wait_ms``)
+    to an idle worker by copying the audio into that worker's shared memory
+    block. A worker process that dies (OOM kill, segfault) fails the batch
+    it was working on and is respawned. ``unload_models()``/``load_models()``
+    let the model manager evict the workers' models while idle.
+    """
+
+    MONITOR_INTERVAL = 1.0  # Seconds between worker liveness checks
+
+    def __init__(self, model_size: str = "base", workers: int = 1, queue_size: int = 8,
+                 timeout: float = 15.0, max_audio_seconds: float = 30.0,
+                 engine: str = "whisper", engine_options: Dict[str, Any] = None, threads: int = 0,
+                 max_batch_size: int = 1, max_wait_ms: float = 0, cpu_options: Dict[str, Any] = None):
+        self.model_size = model_size
+        self.engine = engine
+        self.engine_options = engine_options or {}
+        self.threads = threads
+        self.cpu_options = cpu_options or {}  # voice.stt_cpu
+        self.num_workers = max(1, workers)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.max_samples = int(SAMPLE_RATE * max_audio_seconds)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+
+        self.workers: List[_Worker] = []
+        self.failed_workers = 0
+        self.running = False
+        self._context = None
+        self._pipes: Dict[int, Any] = {}  # Reply pipe per live worker id
+        self._worker_ids = itertools.count()
+        self._by_id: Dict[int, _Worker] = {}  # Live workers
+        self._reader: Optional[threading.Thread] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._in_flight: Dict[int, _Request] = {}
+        self._carry: Optional[tuple] = None  # Dequeued request held for the next batch
+        self._ids = itertools.count()
+        self._ready_event = threading.Event()
+        self.last_used = time.monotonic()  # For idle unloading (core.model_manager)
+        self._model_replies: set = set()  # Workers yet to answer a load/unload
+        self._model_event = threading.Event()
+
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.too_long = 0
+        self.restarts = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self._wait_ms = deque(maxlen=200)
+        self._inference_ms = deque(maxlen=200)
+
+    def start(self):
+        """Spawn the worker processes (call from the event loop)"""
+        if self.running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.PriorityQueue(maxsize=self.queue_size)
+        self._idle = asyncio.Queue()
+
+        # spawn, not fork: the server process already runs threads
+        self._context = mp.get_context("spawn")
+
+        for slot in range(self.num_workers):
+            block = shared_memory.SharedMemory(create=True, size=self.max_batch_size * self.max_samples * 4)
+            self.workers.append(self._spawn(slot, block))
+
+        self.running = True
+        self._reader = threading.Thread(target=self._read_results, name="nuxai-stt-results", daemon=True)
+        self._reader.start()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        self._monitor_task = asyncio.create_task(self._monitor())
+        logger.info(f"🧵 STT service started: {self.num_workers} worker(s), {self.engine} {self.model_size}")
+
+    def _spawn(self, slot: int, block: shared_memory.SharedMemory) -> _Worker:
+        """Start a worker process for a pool slot, using the slot's shared memory"""
+        worker_id = next(self._worker_ids)
+        requests = self._context.Queue()
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_id, self.engine, self.model_size, self.engine_options, self.threads,
+                  self.cpu_options, block.name, self.max_batch_size, self.max_samples, requests, sender),
+            name=f"nuxai-stt-{slot}",
+            daemon=True
+        )
+        process.start()
+        sender.close()  # The worker holds the only write end, so its death reads as EOF
+        self._pipes[worker_id] = receiver
+        buffer = np.ndarray((self.max_batch_size, self.max_samples), dtype=np.float32, buffer=block.buf)
+        worker = _Worker(worker_id, slot, process, requests, block, buffer)
+        self._by_id[worker_id] = worker
+        return worker
+
+    @property
+    def ready(self) -> bool:
+        """True once at least one worker has loaded its model"""
+        return self._ready_event.is_set()
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """Block until a worker is ready (for use from a thread)"""
+        return self._ready_event.wait(timeout)
+
+    async def transcribe(self, audio: np.ndarray, priority: int = PRIORITY_COMMAND,
+                         options: Dict[str, Any] = None, timeout: float = None) -> Optional[str]:
+        """Queue float32 16 kHz audio for transcription
+
+        Returns None when the queue is full, the audio is longer than
+        ``max_audio_seconds``, the request times out or the worker fails.
+        """
+        if not self.running or self.failed_workers == self.num_workers:
+            return None
+        self.last_used = time.monotonic()
+        if len(audio) > self.max_samples:
+            self.too_long += 1
+            logger.warning(f"STT request of {len(audio) / SAMPLE_RATE:.1f}s exceeds "
+                           f"voice.stt_service.max_audio_seconds ({self.max_samples / SAMPLE_RATE:.0f}s), rejected")
+            return None
+
+        request = _Request(audio, options or {}, self._loop.create_future())
+        try:
+            self._queue.put_nowait((priority, next(self._ids), request))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            logger.warning("STT queue full, request rejected")
+            return None
+
+        try:
+            return await asyncio.wait_for(request.future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning("STT request timed out")
+            return None
+
+    @property
+    def models_loaded(self) -> bool:
+        """True if any live worker holds its model"""
+        return any(w.loaded for w in self._live_workers())
+
+    def _live_workers(self) -> List[_Worker]:
+        return [w for w in list(self.workers) if w.ready and self._by_id.get(w.worker_id) is w]
+
+    def unload_models(self, idle_seconds: float = 0) -> bool:
+        """Have the workers drop their models (blocking)
+
+        A worker that decoded anything within idle_seconds keeps its model,
+        since the request may have been queued after the idle check. Returns
+        False if any worker kept its model.
+        """
+        self._model_command(("unload", idle_seconds))
+        return not self.models_loaded
+
+    def load_models(self) -> bool:
+        """Have the workers reload their models (blocking)"""
+        self._model_command(("load",))
+        return self.models_loaded
+
+    def _model_command(self, command: tuple):
+        """Send a load/unload to every live worker and wait for the replies (from a thread)"""
+        workers = self._live_workers()
+        self._model_replies = {w.worker_id for w in workers}
+        self._model_event.clear()
+        for worker in workers:
+            worker.requests.put(command)
+        if workers and not self._model_event.wait(self.timeout):
+            logger.warning(f"STT workers did not answer '{command[0]}' within {self.timeout}s")
+
+    async def _next_request(self, timeout: float = None) -> Optional[tuple]:
+        """Next live queue entry, or None if none arrives within timeout"""
+        while True:
+            if self._carry:
+                entry, self._carry = self._carry, None
+            elif timeout is None:
+                entry = await self._queue.get()
+            elif timeout <= 0:
+                try:
+                    entry = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return None
+            else:
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    return None
+
+            # Skip requests that timed out or were cancelled while queued
+            if not entry[2].future.done():
+                return entry
+
+    async def _collect_batch(self) -> List[tuple]:
+        """The highest-priority request plus any that can join its batch"""
+        batch = [await self._next_request()]
+        options = batch[0][2].options
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            entry = await self._next_request(deadline - time.perf_counter())
+            if entry is None:
+                break
+            if entry[2].options != options:
+                self._carry = entry
+                break
+            batch.append(entry)
+        return batch
+
+    def _usable(self, worker: _Worker) -> bool:
+        return self._by_id.get(worker.worker_id) is worker and worker.process.is_alive()
+
+    async def _next_worker(self) -> _Worker:
+        """An idle worker that is still alive (dead ones are left to the monitor)"""
+        while True:
+            worker = await self._idle.get()
+            if self._usable(worker):
+                return worker
+
+    async def _dispatch(self):
+        """Hand queued requests to idle workers in priority order"""
+        while True:
+            worker = await self._next_worker()
+            batch = await self._collect_batch()
+            while not self._usable(worker):
+                worker = await self._next_worker()  # Died while waiting for the batch
+
+            now = time.perf_counter()
+            request_ids, lengths = [], []
+            for row, (_, request_id, request) in enumerate(batch):
+                self._wait_ms.append((now - request.enqueued) * 1000)
+                length = len(request.audio)
+                worker.buffer[row, :length] = request.audio
+                self._in_flight[request_id] = request
+                request_ids.append(request_id)
+                lengths.append(length)
+
+            self.batches += 1
+            self.batched_requests += len(batch)
+            worker.batch = request_ids
+            worker.requests.put((request_ids, lengths, batch[0][2].options))
+
+    async def _monitor(self):
+        """Notice worker processes that died without reporting (OOM kill, segfault)"""
+        while True:
+            await asyncio.sleep(self.MONITOR_INTERVAL)
+            self._check_workers()
+
+    def _check_workers(self):
+        if not self.running:
+            return  # Workers exit on purpose when the service stops
+        for worker in list(self.workers):
+            if self._by_id.get(worker.worker_id) is worker and not worker.process.is_alive():
+                self._on_worker_exit(worker)
+
+    def _on_worker_exit(self, worker: _Worker):
+        """Fail a dead worker's batch and respawn it (event loop)"""
+        logger.error(f"STT worker {worker.slot} died (exit code {worker.process.exitcode})")
+        self._by_id.pop(worker.worker_id, None)
+        worker.requests.cancel_join_thread()  # Nobody will read what is still queued for it
+        self._fail_requests(worker.batch)
+        worker.batch = []
+        if worker.worker_id in self._model_replies:
+            self._model_replies.discard(worker.worker_id)
+            if not self._model_replies:
+                self._model_event.set()
+
+        if not worker.ready:
+            # Crashed while loading its model; a new process would crash again
+            worker.failed = True
+            self._on_worker_failed()
+            return
+
+        self.restarts += 1
+        self.workers[worker.slot] = self._spawn(worker.slot, worker.block)
+        logger.info(f"🔄 STT worker {worker.slot} respawned")
+
+    def _fail_requests(self, request_ids: List[int]):
+        """Resolve in-flight requests with None"""
+        for request_id in request_ids:
+            request = self._in_flight.pop(request_id, None)
+            if request and not request.future.done():
+                self.failed += 1
+                request.future.set_result(None)
+
+    def _on_worker_failed(self):
+        self.failed_workers += 1
+        if self.failed_workers == self.num_workers:
+            # Nothing will ever serve the queue; fail waiting requests now
+            while not self._queue.empty():
+                request = self._queue.get_nowait()[2]
+                if not request.future.done():
+                    request.future.set_result(None)
+
+    def _read_results(self):
+        """Forward worker messages to the event loop (runs on a thread)"""
+        while self.running:
+            pipes = {receiver: worker_id for worker_id, receiver in list(self._pipes.items())}
+            for receiver in connection.wait(list(pipes), timeout=self.MONITOR_INTERVAL):
+                try:
+                    message = receiver.recv()
+                except (EOFError, OSError):
+                    # The worker exited; let the monitor deal with it right away
+                    self._pipes.pop(pipes[receiver], None)
+                    receiver.close()
+                    self._loop.call_soon_threadsafe(self._check_workers)
+                    continue
+                self._loop.call_soon_threadsafe(self._on_message, message)
+
+    def _on_message(self, message: tuple):
+        """Handle a worker message (event loop)"""
+        kind, worker_id = message[0], message[1]
+        worker = self._by_id.get(worker_id)
+
+        if worker is None:
+            return  # From a worker that died; its requests were already failed
+
+        if kind == "ready":
+            worker.ready = True
+            worker.rtf = message[2]
+            self._ready_event.set()
+            self._idle.put_nowait(worker)
+            if worker.rtf is not None:
+                logger.info(f"✅ STT worker {worker.slot} ready (real-time factor {worker.rtf:.2f})")
+            else:
+                logger.info(f"✅ STT worker {worker.slot} ready")
+            return
+
+        if kind == "model":
+            worker.loaded = message[2]
+            self._model_replies.discard(worker_id)
+            if not self._model_replies:
+                self._model_event.set()
+            return
+
+        if kind == "failed":
+            logger.error(f"STT worker {worker.slot} could not load {self.engine}: {message[2]}")
+            worker.failed = True
+            self._by_id.pop(worker_id, None)
+            self._on_worker_failed()
+            return
+
+        _, _, request_ids, texts, inference_s, error = message
+        self._inference_ms.append(inference_s * 1000)
+        worker.batch = []
+        self._idle.put_nowait(worker)
+
+        if error:
+            self.failed += len(request_ids)
+            logger.error(f"STT worker failed: {error}")
+        else:
+            self.completed += len(request_ids)
+
+        for request_id, text in zip(request_ids, texts):
+            request = self._in_flight.pop(request_id, None)
+            if request and not request.future.done():
+                request.future.set_result(text)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue and latency metrics"""
+        wait_ms = list(self._wait_ms)
+        inference_ms = list(self._inference_ms)
+        return {
+            "workers": self.num_workers,
+            "workers_ready": sum(1 for w in self.workers if w.ready),
+            "workers_alive": sum(1 for w in self.workers if w.process.is_alive()),
+            "workers_loaded": sum(1 for w in self._live_workers() if w.loaded),
+            "restarts": self.restarts,
+            "worker_rtf": [round(w.rtf, 3) if w.rtf is not None else None for w in self.workers],
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "in_flight": len(self._in_flight),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "too_long": self.too_long,
+            "batches": self.batches,
+            "batch_size_mean": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "wait_ms_mean": round(sum(wait_ms) / len(wait_ms), 1) if wait_ms else 0.0,
+            "wait_ms_p95": round(percentile(wait_ms, 95), 1),
+            "inference_ms_mean": round(sum(inference_ms) / len(inference_ms), 1) if inference_ms else 0.0,
+            "inference_ms_p95": round(percentile(inference_ms, 95), 1)
+        }
+
+    def stop(self):
+        """Stop the workers and release shared memory"""
+        if not self.running:
+            return
+        self.running = False
+
+        if self._dispatcher:
+            self._dispatcher.cancel()
+        if self._monitor_task:
+            self._monitor_task.cancel()
+
+        for worker in self.workers:
+            worker.requests.put(None)
+        for worker in self.workers:
+            worker.process.join(timeout=2.0)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.buffer = None
+            worker.block.close()
+            worker.block.unlink()
+
+        if self._reader:
+            self._reader.join(timeout=2 * self.MONITOR_INTERVAL)
+        for receiver in self._pipes.values():
+            receiver.close()
+        self._pipes = {}
+        self.workers = []
+        logger.info("STT service stopped")
@@ -0,0 +1,363 @@
+"""
+TTS Backends (v1.1)
+Pluggable text-to-speech engines behind one interface
+"""
+import os
+import selectors
+import shutil
+import subprocess
+import tempfile
+import wave
+import numpy as np
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterator, List, Optional
+from utils.logger import setup_logger
+from core.audio_playback import AudioPlayer
+
+logger = setup_logger(__name__)
+
+DEFAULT_RATE = 175  # Words per minute
+
+
+class TTSBackend(ABC):
+    """Base class for text-to-speech engines
+
+    All methods are called from the TTS engine's speech thread only.
+    ``speak`` plays audio and returns False if ``should_stop`` cut it short;
+    ``synthesize`` yields 16-bit mono PCM at ``sample_rate`` without playing it.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.rate = DEFAULT_RATE
+        self.volume = 0.9
+        self.voice_id: Optional[int] = None
+        self.sample_rate: Optional[int] = None
+        self.voices: List[Dict[str, Any]] = []
+
+    @abstractmethod
+    def load(self):
+        """Start the engine (blocking)"""
+        pass
+
+    @abstractmethod
+    def speak(self, text: str, should_stop: Callable[[], bool], on_start: Callable[[], None]) -> bool:
+        """Say text on the output device (blocking)"""
+        pass
+
+    @abstractmethod
+    def synthesize(self, text: str) -> Iterator[bytes]:
+        """PCM chunks for text, as early as the engine produces them"""
+        pass
+
+    def save_wav(self, text: str, path: Path):
+        """Render text to a WAV file"""
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            for chunk in self.synthesize(text):
+                wav.writeframes(chunk)
+
+    def voice_key(self) -> str:
+        """Identifies the voice for the audio cache"""
+        return f"{self.name}:{self.voice_id}"
+
+    def configure(self, rate: int = None, volume: float = None, voice_id: int = None):
+        """Apply voice settings (None leaves a setting unchanged)"""
+        if rate is not None:
+            self.rate = rate
+        if volume is not None:
+            self.volume = volume
+        if voice_id is not None:
+            self.voice_id = voice_id
+
+    def close(self):
+        """Release the engine"""
+        pass
+
+
+class Pyttsx3Backend(TTSBackend):
+    """The platform speech driver (SAPI5, NSSpeechSynthesizer, espeak) via pyttsx3
+
+    pyttsx3 cannot hand out audio while it is being synthesized, so
+    ``synthesize`` renders the whole text to a temporary WAV first.
+    """
+
+    name = "pyttsx3"
+
+    def __init__(self):
+        super().__init__()
+        self.engine = None
+        self._should_stop: Optional[Callable[[], bool]] = None
+        self._on_start: Optional[Callable[[], None]] = None
+        self._stopped = False
+
+    def load(self):
+        import pyttsx3
+
+        self.engine = pyttsx3.init()
+        self.engine.setProperty('rate', self.rate)
+        self.engine.setProperty('volume', self.volume)
+        self.engine.connect('started-utterance', self._on_started)
+        self.engine.connect('started-word', self._on_word)
+
+        # List available voices
+        voices = self.engine.getProperty('voices')
+        logger.info(f"📢 Available voices: {len(voices)}")
+
+        for idx, voice in enumerate(voices):
+            logger.debug(f"  {idx}: {voice.name} ({voice.gender})")
+        self.voices = [
+            {
+                "id": idx,
+                "name": voice.name,
+                "languages": voice.languages,
+                "gender": voice.gender
+            }
+            for idx, voice in enumerate(voices)
+        ]
+
+        # Set voice if specified
+        if self.voice_id is not None and self.voice_id < len(voices):
+            self.engine.setProperty('voice', voices[self.voice_id].id)
+
+    def speak(self, text: str, should_stop: Callable[[], bool], on_start: Callable[[], None]) -> bool:
+        self._should_stop, self._on_start, self._stopped = should_stop, on_start, False
+        try:
+            self.engine.say(text)
+            self.engine.runAndWait()
+        finally:
+            self._should_stop = self._on_start = None
+        return not self._stopped
+
+    def _on_started(self, name):
+        """Engine callback: audio is starting"""
+        if self._on_start:
+            self._on_start()
+
+    def _on_word(self, name, location, length):
+        """Engine callback: the only point where pyttsx3 can be stopped safely"""
+        if self._should_stop and self._should_stop():
+            self._stopped = True
+            self.engine.stop()
+
+    def save_wav(self, text: str, path: Path):
+        self.engine.save_to_file(text, str(path))
+        self.engine.runAndWait()
+
+    def synthesize(self, text: str) -> Iterator[bytes]:
+        with tempfile.TemporaryDirectory(prefix="nuxai-tts-") as directory:
+            path = Path(directory) / "speech.wav"
+            self.save_wav(text, path)
+            with wave.open(str(path), "rb") as wav:
+                if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                    raise ValueError("speech driver did not produce 16-bit mono audio")
+                self.sample_rate = wav.getframerate()
+                frames = wav.readframes(wav.getnframes())
+        yield frames
+
+    def configure(self, rate: int = None, volume: float = None, voice_id: int = None):
+        super().configure(rate, volume, voice_id)
+        if self.engine is None:
+            return
+        if rate is not None:
+            self.engine.setProperty('rate', rate)
+        if volume is not None:
+            self.engine.setProperty('volume', volume)
+        if voice_id is not None:
+            voices = self.engine.getProperty('voices')
+            if voice_id < len(voices):
+                self.engine.setProperty('voice', voices[voice_id].id)
+
+    def close(self):
+        if self.engine:
+            try:
+                self.engine.stop()
+            except Exception:
+                pass
+            self.engine = None
+
+
+class PiperBackend(TTSBackend):
+    """One long-running Piper process, fed a line of text per utterance
+
+    Piper (``--output-raw``) writes each sentence's 16-bit PCM to stdout as
+    soon as it is synthesized, then logs ``Real-time factor`` on stderr once
+    the whole input line is done. That log line marks the end of an
+    utterance, so the process and its voice model stay loaded between
+    utterances. If Piper goes ``timeout`` seconds without any output (stuck,
+    or a build that does not log the marker) the utterance ends there and the
+    process is restarted. Needs POSIX pipes (``selectors`` on Windows only
+    supports sockets).
+    """
+
+    name = "piper"
+    END_MARKER = b"Real-time factor"
+
+    def __init__(self, model: str = None, executable: str = "piper", sample_rate: int = 22050,
+                 speaker: Optional[int] = None, timeout: float = 15.0):
+        super().__init__()
+        self.model = model
+        self.executable = executable
+        self.sample_rate = sample_rate
+        self.voice_id = speaker
+        self.timeout = timeout
+        self.process: Optional[subprocess.Popen] = None
+        self.player = AudioPlayer()
+        self._stderr = b""
+        self._unfinished = False  # A synthesis was abandoned; drain it first
+
+    def load(self):
+        if not self.model:
+            raise ValueError("tts.piper.model is not set")
+        if os.name == "nt":
+            raise RuntimeError("the Piper backend needs POSIX pipes")
+        executable = shutil.which(self.executable)
+        if executable is None:
+            raise FileNotFoundError(f"Piper executable '{self.executable}' not found")
+
+        command = [executable, "--model", str(Path(self.model).expanduser()), "--output-raw",
+                   "--length_scale", f"{DEFAULT_RATE / max(self.rate, 1):.3f}"]
+        if self.voice_id is not None:
+            command += ["--speaker", str(self.voice_id)]
+
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE, bufsize=0)
+        self._stderr = b""
+        self._unfinished = False
+        self.voices = [{"id": self.voice_id or 0, "name": Path(self.model).stem,
+                        "languages": [], "gender": None}]
+        logger.info(f"🔊 Piper started (pid {self.process.pid}, {Path(self.model).name})")
+
+    def voice_key(self) -> str:
+        return f"{self.name}:{Path(self.model or '').stem}:{self.voice_id}"
+
+    def _running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _read(self) -> Iterator[bytes]:
+        """PCM of the current line until Piper reports it finished"""
+        selector = selectors.DefaultSelector()
+        selector.register(self.process.stdout, selectors.EVENT_READ)
+        selector.register(self.process.stderr, selectors.EVENT_READ)
+        try:
+            while True:
+                if not selector.get_map():
+                    raise RuntimeError("Piper closed its output")
+                events = selector.select(self.timeout)
+                if not events:
+                    logger.warning(f"Piper produced no output for {self.timeout}s "
+                                   f"without finishing the utterance, restarting it")
+                    self._restart()
+                    return
+                for key, _ in events:
+                    data = os.read(key.fileobj.fileno(), 65536)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        continue
+                    if key.fileobj is self.process.stdout:
+                        yield data
+                        continue
+
+                    self._stderr += data
+                    if self.END_MARKER in self._stderr:
+                        self._stderr = self._stderr.split(b"\n")[-1]
+                        # Audio was flushed before the log line; collect what is left
+                        yield from self._drain()
+                        return
+        finally:
+            selector.close()
+
+    def _restart(self):
+        self.process.kill()
+        self.process.wait()
+        self.process = None
+        self.load()
+
+    def _drain(self) -> Iterator[bytes]:
+        stdout = self.process.stdout.fileno()
+        os.set_blocking(stdout, False)
+        try:
+            while True:
+                try:
+                    data = os.read(stdout, 65536)
+                except BlockingIOError:
+                    return
+                if not data:
+                    return
+                yield data
+        finally:
+            os.set_blocking(stdout, True)
+
+    def synthesize(self, text: str) -> Iterator[bytes]:
+        if not self._running():
+            logger.warning("Piper is not running, restarting it")
+            self.load()
+        if self._unfinished:
+            for _ in self._read():
+                pass
+            self._unfinished = False
+
+        line = " ".join(text.split())
+        if not line:
+            return
+        self._write(line.encode() + b"\n")
+
+        self._unfinished = True
+        remainder = b""
+        for data in self._read():
+            data, remainder = remainder + data, b""
+            if len(data) % 2:
+                data, remainder = data[:-1], data[-1:]
+            if self.volume < 1.0:
+                samples = np.frombuffer(data, dtype=np.int16) * self.volume
+                data = samples.astype(np.int16).tobytes()
+            yield data
+        self._unfinished = False
+
+    def _write(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            view = view[self.process.stdin.write(view):]
+
+    def speak(self, text: str, should_stop: Callable[[], bool], on_start: Callable[[], None]) -> bool:
+        return self.player.play_pcm(self.synthesize(text), self.sample_rate, should_stop, on_start)
+
+    def configure(self, rate: int = None, volume: float = None, voice_id: int = None):
+        restart = (rate is not None and rate != self.rate) or (voice_id is not None and voice_id != self.voice_id)
+        super().configure(rate, volume, voice_id)
+        if restart and self._running():
+            # Speed and speaker are command-line options
+            self.close()
+            self.load()
+
+    def close(self):
+        if self.process:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=2)
+            except Exception:
+                self.process.kill()
+            self.process = None
+        self.player.close()
+
+
+TTS_BACKENDS = {
+    Pyttsx3Backend.name: Pyttsx3Backend,
+    PiperBackend.name: PiperBackend,
+}
+
+
+def create_tts_backend(engine: str = "pyttsx3", engine_options: Dict[str, Any] = None) -> TTSBackend:
+    """Create a TTS backend by name (see ``tts.engine``)"""
+    backend_class = TTS_BACKENDS.get(engine)
+    if backend_class is None:
+        logger.warning(f"Unknown TTS engine '{engine}', using pyttsx3")
+        backend_class = Pyttsx3Backend
+
+    if backend_class is PiperBackend:
+        return backend_class(**(engine_options or {}))
+    return backend_class()
@@ -0,0 +1,138 @@
+"""
+TTS Audio Cache (v1.1)
+Content-addressed WAV files for phrases NuxAI says often
+"""
+import hashlib
+import json
+import os
+import threading
+import wave
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CACHE_DIR = Path.home() / ".nuxai" / "tts_cache"
+
+
+def cache_key(text: str, voice: Any, rate: int, volume: float) -> str:
+    """Address of the audio for text spoken with these voice settings"""
+    identity = {"text": text, "voice": voice, "rate": rate, "volume": round(volume, 3)}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:32]
+
+
+class TTSCache:
+    """Pre-rendered speech on disk with LRU eviction
+
+    Files are named by :func:`cache_key`. A file's mtime is refreshed on
+    every hit, so pruning removes the least recently played files first until
+    the dynamic responses (up to ``max_chars`` long) fit in ``max_mb``. Pinned
+    keys (the personality templates) are never evicted and not counted.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_mb: float = 50, max_chars: int = 200):
+        self.directory = Path(directory).expanduser() if directory else CACHE_DIR
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_chars = max_chars
+        self.pinned = set()
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self.evictions = 0
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.wav"
+
+    def cacheable(self, text: str) -> bool:
+        return 0 < len(text) <= self.max_chars
+
+    def get(self, key: str) -> Optional[Path]:
+        """Cached audio for key, marking it recently used"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def contains(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def pin(self, keys: Iterable[str]):
+        """Protect keys from eviction (replaces the previous pinned set)"""
+        self.pinned = set(keys)
+
+    def add(self, key: str, render: Callable[[Path], None]) -> Optional[Path]:
+        """Render audio into the cache with render(path)
+
+        The file is written under a temporary name and only moved into place
+        once it reads back as a valid WAV, so a crash or an engine that writes
+        another format never leaves a broken entry.
+        """
+        path = self.path(key)
+        partial = path.with_suffix(".part.wav")
+        try:
+            render(partial)
+            with wave.open(str(partial), "rb") as wav:
+                if wav.getnframes() == 0:
+                    raise ValueError("empty audio")
+            os.replace(partial, path)
+        except Exception as e:
+            logger.warning(f"Could not cache TTS audio: {e}")
+            partial.unlink(missing_ok=True)
+            return None
+
+        self.renders += 1
+        self.prune()
+        return path
+
+    def prune(self):
+        """Evict least recently used dynamic responses until under the size cap"""
+        with self._lock:
+            files = []
+            for path in self.directory.glob("*.wav"):
+                if path.name.endswith(".part.wav") or path.stem in self.pinned:
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.evictions += 1
+
+    def size_bytes(self) -> int:
+        total = 0
+        for path in self.directory.glob("*.wav"):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass  # Evicted meanwhile
+        return total
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and disk use"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "renders": self.renders,
+            "evictions": self.evictions,
+            "pinned": len(self.pinned),
+            "size_mb": round(self.size_bytes() / 1024 / 1024, 2),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 1)
+        }
@@ -1,149 +1,576 @@
 """
 Text-to-Speech Engine (v0.3)
-Provides voice responses using pyttsx3
+Provides voice responses through a pluggable TTS backend
 """
-import pyttsx3
 import asyncio
-from typing import Optional
+import itertools
+import queue
+import re
+import threading
+import time
+import wave
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Iterable, AsyncIterable, Union
 from utils.logger import setup_logger
+from core.audio_playback import AudioPlayer
+from core.audio_stream import AudioStreamHub
+from core.benchmark import percentile
+from core.tts_backend import create_tts_backend
+from core.tts_cache import TTSCache, cache_key
+from core.websocket_manager import ConnectionManager
 
 logger = setup_logger(__name__)
 
+# Speech queue priorities (lower is spoken first)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+_PRIORITY_CONTROL = -1  # Property changes and shutdown, ahead of any speech
+_PRIORITY_BACKGROUND = 9  # Cache rendering, only when nothing is waiting to be said
+
+
+class SentenceSplitter:
+    """Cuts incrementally arriving text into sentences as each one completes
+
+    Sentences longer than ``max_chars`` are cut at a comma or space so
+    run-on model output does not hold back the first audio.
+    """
+
+    BOUNDARY = re.compile(r"[.!?]+[\"')\]]*\s+")
+
+    def __init__(self, max_chars: int = 200):
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add text, returning the sentences it completed"""
+        self.buffer += text
+        sentences = []
+        while True:
+            match = self.BOUNDARY.search(self.buffer)
+            end = match.end() if match else None
+            if end is None or end > self.max_chars:
+                if len(self.buffer) <= self.max_chars:
+                    break
+                end = self._cut_point()
+            sentence = self.buffer[:end].strip()
+            self.buffer = self.buffer[end:]
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def _cut_point(self) -> int:
+        window = self.buffer[:self.max_chars]
+        comma = window.rfind(", ")
+        if comma > self.max_chars // 2:
+            return comma + 1
+        space = window.rfind(" ")
+        return space + 1 if space > 0 else self.max_chars
+
+    def flush(self) -> List[str]:
+        """The unterminated remainder at the end of the text"""
+        rest, self.buffer = self.buffer.strip(), ""
+        return [rest] if rest else []
+
+
+def split_sentences(text: str, max_chars: int = 200) -> List[str]:
+    splitter = SentenceSplitter(max_chars)
+    return splitter.feed(text) + splitter.flush()
+
+
+async def _iterate(chunks: Union[Iterable[str], AsyncIterable[str]]):
+    """Async iteration over either kind of text stream"""
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    # Blocking producers (e.g. a local LLM generator) are read on a worker thread
+    loop = asyncio.get_running_loop()
+    iterator = iter(chunks)
+    end = object()
+    while True:
+        chunk = await loop.run_in_executor(None, next, iterator, end)
+        if chunk is end:
+            break
+        yield chunk
+
+
+@dataclass(eq=False)
+class _Speech:
+    """One speak() or speak_stream() call, said as one or more sentence chunks"""
+    generation: int  # Speech from an older generation is stale
+    loop: asyncio.AbstractEventLoop
+    done: asyncio.Future  # Resolved once the final chunk is done
+    requested: float = field(default_factory=time.perf_counter)
+    said: List[str] = field(default_factory=list)
+    audio_started: bool = False
+    interrupted: bool = False
+
+
+@dataclass(eq=False)
+class _Utterance:
+    """One chunk of speech waiting to be spoken"""
+    text: str  # Empty for the end-of-speech marker
+    speech: _Speech
+    final: bool = False
+    enqueued: float = field(default_factory=time.perf_counter)
+
 
 class TTSEngine:
-    """Text-to-speech engine for voice responses"""
-    
-    def __init__(self):
-        self.engine = None
+    """Text-to-speech engine for voice responses
+
+    TTS drivers are not thread-safe, so one worker thread owns the engine and
+    speaks utterances from a priority queue in order. ``cancel()`` (barge-in)
+    drops everything queued and interrupts the current utterance at the next
+    word. Overlay clients get ``speech_started``/``speech_finished`` events.
+
+    Text is queued sentence by sentence, so playback of the first sentence
+    starts while later ones are still being synthesized or, with
+    ``speak_stream()``, still being generated.
+
+    Phrases found in the audio cache (``tts.cache``) are played from WAV
+    instead of being synthesized; cache rendering runs on the same thread
+    when no speech is queued.
+
+    With ``tts.remote_audio`` enabled and an overlay subscribed, speech is
+    synthesized to PCM and streamed to the overlay as it is produced (and
+    also played here unless ``play_locally`` is off).
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = config or {}
         self.initialized = False
         self.enabled = True
-        
+        self.ws_manager = ConnectionManager()
+
         # Voice settings
         self.rate = 175  # Words per minute
         self.volume = 0.9  # 0.0 to 1.0
         self.voice_id = None  # None = default
-        
+        self.voices = []
+        engine = self.config.get("engine", "pyttsx3")
+        self.backend = create_tts_backend(engine, self.config.get(engine, {}))
+        self.backend.configure(self.rate, self.volume, self.voice_id)
+        self.max_chunk_chars = self.config.get("max_chunk_chars", 200)
+
+        # Speech worker
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._current: Optional[_Utterance] = None
+        self.generation = 0
+
+        # Statistics
+        self.spoken = 0
+        self.interrupted = 0
+        self.dropped = 0
+        self.chunks = 0
+        self._queue_ms = deque(maxlen=200)
+        self._first_audio_ms = deque(maxlen=200)
+
+        # Pre-rendered audio (personality templates and short dynamic responses)
+        cache_config = self.config.get("cache", {})
+        self.cache: Optional[TTSCache] = None
+        if cache_config.get("enabled", True):
+            self.cache = TTSCache(
+                directory=cache_config.get("directory"),
+                max_mb=cache_config.get("max_mb", 50),
+                max_chars=cache_config.get("max_chars", 200)
+            )
+        self.player = AudioPlayer()
+        self.cache_playback = True  # Cleared if the output device cannot be opened
+        self._templates: List[str] = []
+
+        # Speech audio for overlay clients
+        remote_config = self.config.get("remote_audio", {})
+        self.audio_stream: Optional[AudioStreamHub] = None
+        if remote_config.get("enabled", False):
+            self.audio_stream = AudioStreamHub(
+                window=remote_config.get("window", 20),
+                frame_ms=remote_config.get("frame_ms", 100),
+                max_buffer_frames=remote_config.get("max_buffer_frames", 300),
+                stall_timeout=remote_config.get("stall_timeout", 5)
+            )
+        self.play_locally = remote_config.get("play_locally", True)
+
     def initialize(self):
-        """Initialize the TTS engine"""
+        """Initialize the TTS engine (on the speech thread)"""
         if self.initialized:
             return
-        
+
         try:
-            logger.info("🔊 Initializing TTS engine...")
-            self.engine = pyttsx3.init()
-            
-            # Configure engine
-            self.engine.setProperty('rate', self.rate)
-            self.engine.setProperty('volume', self.volume)
-            
-            # List available voices
-            voices = self.engine.getProperty('voices')
-            logger.info(f"📢 Available voices: {len(voices)}")
-            
-            for idx, voice in enumerate(voices):
-                logger.debug(f"  {idx}: {voice.name} ({voice.gender})")
-            
-            # Set voice if specified
-            if self.voice_id is not None and self.voice_id < len(voices):
-                self.engine.setProperty('voice', voices[self.voice_id].id)
-            
+            logger.info(f"🔊 Initializing TTS engine ({self.backend.name})...")
+            # Settings changed before the speech thread started were never submitted
+            self.backend.configure(self.rate, self.volume, self.voice_id)
+            try:
+                self.backend.load()
+            except Exception as e:
+                if self.backend.name == "pyttsx3":
+                    raise
+                logger.warning(f"{self.backend.name} unavailable ({e}), falling back to pyttsx3")
+                self.backend = create_tts_backend("pyttsx3")
+                self.backend.configure(self.rate, self.volume, self.voice_id)
+                self.backend.load()
+            self.voices = self.backend.voices
+
             self.initialized = True
             logger.info("✅ TTS engine initialized")
-            
+
         except Exception as e:
             logger.error(f"Failed to initialize TTS engine: {e}")
             self.enabled = False
-    
-    async def speak(self, text: str, wait: bool = True):
-        """Speak the given text"""
+
+    def _start(self):
+        """Start the speech thread if it is not running"""
+        if self._thread is None or not self._thread.is_alive():
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run, name="nuxai-tts", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Speech thread: own the engine and speak queued utterances"""
+        self.initialize()
+        self._ready.set()
+
+        while True:
+            _, _, item = self._queue.get()
+            if item is None:
+                break
+            if callable(item):
+                self._run_control(item)
+            else:
+                self._speak_sync(item)
+
+        self.backend.close()
+        self.player.close()
+        self.initialized = False
+
+    def _run_control(self, action):
+        try:
+            if self.initialized:
+                action()
+        except Exception as e:
+            logger.error(f"TTS setting failed: {e}")
+
+    def _submit(self, action):
+        """Run an engine call on the speech thread"""
+        if self._thread and self._thread.is_alive():
+            self._queue.put((_PRIORITY_CONTROL, next(self._sequence), action))
+
+    def warmup(self) -> bool:
+        """Initialize the engine ahead of the first response"""
+        self._start()
+        self._ready.wait(timeout=30)
+        return self.initialized
+
+    async def speak(self, text: str, wait: bool = True, priority: int = PRIORITY_NORMAL):
+        """Speak the given text
+
+        Args:
+            text: What to say
+            wait: Return only once it has been spoken (or cancelled)
+            priority: PRIORITY_HIGH jumps ahead of queued PRIORITY_NORMAL speech
+        """
         if not self.enabled:
             logger.debug(f"TTS disabled, would say: '{text}'")
             return
-        
-        if not self.initialized:
-            self.initialize()
-        
-        if not self.initialized:
-            return
-        
+
         try:
             logger.info(f"🗣️ Speaking: '{text}'")
-            
+            speech = self._new_speech()
+            for sentence in split_sentences(text, self.max_chunk_chars):
+                self._enqueue(sentence, speech, priority)
+            self._enqueue("", speech, priority, final=True)
+
             if wait:
-                # Run in executor to avoid blocking
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, self._speak_sync, text)
+                await speech.done
+
+        except Exception as e:
+            logger.error(f"Error speaking: {e}")
+
+    async def speak_stream(self, chunks: Union[Iterable[str], AsyncIterable[str]], wait: bool = True,
+                           priority: int = PRIORITY_NORMAL):
+        """Speak text while it is still being produced (e.g. streamed LLM tokens)
+
+        Args:
+            chunks: Async iterable, or blocking iterable read on a worker thread
+            wait: Return only once everything has been spoken (or cancelled)
+            priority: As for speak()
+        """
+        if not self.enabled:
+            logger.debug("TTS disabled, ignoring streamed speech")
+            return
+
+        speech = self._new_speech()
+        feeder = asyncio.ensure_future(self._feed(chunks, speech, priority))
+        if wait:
+            await feeder
+            await speech.done
+
+    async def _feed(self, chunks, speech: _Speech, priority: int):
+        """Queue each sentence of a stream as soon as it is complete"""
+        splitter = SentenceSplitter(self.max_chunk_chars)
+        try:
+            async for chunk in _iterate(chunks):
+                if self._is_stale(speech):
+                    break  # Cancelled, stop pulling from the producer
+                for sentence in splitter.feed(chunk):
+                    logger.info(f"🗣️ Speaking: '{sentence}'")
+                    self._enqueue(sentence, speech, priority)
+            for sentence in splitter.flush():
+                self._enqueue(sentence, speech, priority)
+        except Exception as e:
+            logger.error(f"Error reading speech stream: {e}")
+        finally:
+            self._enqueue("", speech, priority, final=True)
+
+    def _new_speech(self) -> _Speech:
+        self._start()
+        loop = asyncio.get_running_loop()
+        return _Speech(self.generation, loop, loop.create_future())
+
+    def _enqueue(self, text: str, speech: _Speech, priority: int, final: bool = False):
+        self._queue.put((priority, next(self._sequence), _Utterance(text, speech, final)))
+
+    def cancel(self):
+        """Barge-in: drop queued speech and cut off the current utterance"""
+        self.generation += 1
+        if self._current:
+            # Backends check _is_stale between words or audio chunks
+            self._current.speech.interrupted = True
+        if self.audio_stream:
+            self.audio_stream.cancel()
+
+    def _speak_sync(self, utterance: _Utterance):
+        """Speak one chunk on the speech thread"""
+        speech = utterance.speech
+        if utterance.text and self.initialized and not self._is_stale(speech):
+            self._say(utterance)
+        if utterance.final:
+            self._complete(speech)
+
+    def _say(self, utterance: _Utterance):
+        self._queue_ms.append((time.perf_counter() - utterance.enqueued) * 1000)
+        self._current = utterance
+        key = self._cache_key(utterance.text) if self.cache else None
+        cached = self.cache.get(key) if key else None
+        try:
+            if self.audio_stream and self.audio_stream.has_subscribers:
+                if not self._say_remote(utterance, cached):
+                    utterance.speech.interrupted = True
+                if key and not cached and self.cache.cacheable(utterance.text):
+                    self._queue_render(utterance.text)
+            elif cached and self._play_cached(cached, utterance):
+                pass
             else:
-                # Fire and forget
-                asyncio.create_task(self._speak_async(text))
-                
+                if not self.backend.speak(utterance.text, lambda: self._is_stale(utterance.speech),
+                                          self._on_started):
+                    utterance.speech.interrupted = True
+                if key and self.cache.cacheable(utterance.text):
+                    # Said live this time; have it ready for the next time
+                    self._queue_render(utterance.text)
+            utterance.speech.said.append(utterance.text)
+            self.chunks += 1
         except Exception as e:
             logger.error(f"Error speaking: {e}")
-    
-    def _speak_sync(self, text: str):
-        """Synchronous speak method"""
-        self.engine.say(text)
-        self.engine.runAndWait()
-    
-    async def _speak_async(self, text: str):
-        """Asynchronous speak method"""
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._speak_sync, text)
-    
+        finally:
+            self._current = None
+
+    def _complete(self, speech: _Speech):
+        """All chunks of a speech are done: count it and notify listeners"""
+        interrupted = self._is_stale(speech)
+        if not speech.audio_started:
+            self.dropped += 1
+        else:
+            if interrupted:
+                self.interrupted += 1
+            else:
+                self.spoken += 1
+            self._emit(speech, {
+                "type": "speech_finished",
+                "text": " ".join(speech.said),
+                "interrupted": interrupted
+            })
+        self._finish(speech)
+
+    def _on_started(self):
+        """Audio for the current chunk is starting"""
+        utterance = self._current
+        if utterance is None or utterance.speech.audio_started:
+            return
+        speech = utterance.speech
+        speech.audio_started = True
+        first_audio_ms = (time.perf_counter() - speech.requested) * 1000
+        self._first_audio_ms.append(first_audio_ms)
+        self._emit(speech, {
+            "type": "speech_started",
+            "text": utterance.text,
+            "first_audio_ms": round(first_audio_ms)
+        })
+
+    def _play_cached(self, path, utterance: _Utterance) -> bool:
+        """Play cached audio; False if there is no usable output device"""
+        if not self.cache_playback:
+            return False
+        try:
+            if not self.player.play_wav(path, lambda: self._is_stale(utterance.speech),
+                                        self._on_started):
+                utterance.speech.interrupted = True
+            return True
+        except Exception as e:
+            logger.warning(f"Cannot play cached TTS audio ({e}), speaking live instead")
+            self.cache_playback = False
+            return False
+
+    def _say_remote(self, utterance: _Utterance, cached) -> bool:
+        """Stream PCM to overlay clients while it is synthesized; False if interrupted"""
+        should_stop = lambda: self._is_stale(utterance.speech)
+        frames = None
+        if cached:
+            with wave.open(str(cached), "rb") as wav:
+                if wav.getsampwidth() == 2 and wav.getnchannels() == 1:
+                    sample_rate = wav.getframerate()
+                    frames = wav.readframes(wav.getnframes())
+        if frames is not None:
+            chunks = (frames[i:i + 8192] for i in range(0, len(frames), 8192))
+        else:
+            chunks = self.backend.synthesize(utterance.text)
+            first = next(chunks, None)
+            if first is None:
+                return True
+            # pyttsx3 only knows its sample rate once it has rendered
+            sample_rate = self.backend.sample_rate
+            chunks = itertools.chain([first], chunks)
+
+        hub = self.audio_stream
+        stream = hub.start_stream(sample_rate, utterance.text)
+
+        def published():
+            for chunk in chunks:
+                hub.publish(stream, chunk)
+                yield chunk
+
+        completed = False
+        try:
+            if self.play_locally:
+                completed = self.player.play_pcm(published(), sample_rate, should_stop, self._on_started)
+            else:
+                for _ in published():
+                    if should_stop():
+                        return False
+                    self._on_started()
+                completed = True
+        finally:
+            hub.end_stream(stream, interrupted=not completed)
+        return completed
+
+    def _is_stale(self, speech: _Speech) -> bool:
+        return speech.interrupted or speech.generation < self.generation
+
+    def _cache_key(self, text: str) -> str:
+        return cache_key(text, self.backend.voice_key(), self.rate, self.volume)
+
+    def prerender(self, phrases: List[str]):
+        """Render phrases (personality templates) into the cache and pin them"""
+        if not self.cache or not self.enabled:
+            return
+        self._templates = list(dict.fromkeys(phrases))
+        self.cache.pin(self._cache_key(text) for text in self._templates)
+        self._start()
+        missing = [text for text in self._templates if not self.cache.contains(self._cache_key(text))]
+        for text in missing:
+            self._queue_render(text)
+        logger.info(f"💾 TTS cache: {len(self._templates) - len(missing)} phrases cached, "
+                    f"{len(missing)} to render")
+
+    def _queue_render(self, text: str):
+        self._queue.put((_PRIORITY_BACKGROUND, next(self._sequence), lambda: self._render(text)))
+
+    def _render(self, text: str):
+        """Synthesize text to a cached WAV (on the speech thread)"""
+        key = self._cache_key(text)
+        if self.cache.contains(key):
+            return
+
+        self.cache.add(key, lambda path: self.backend.save_wav(text, path))
+
+    def _settings_changed(self):
+        """Voice settings are part of the cache key; re-render the templates"""
+        if self._templates:
+            self.prerender(self._templates)
+
+    def _emit(self, speech: _Speech, message: Dict[str, Any]):
+        """Broadcast a speech event from the speech thread"""
+        try:
+            speech.loop.call_soon_threadsafe(
+                lambda: asyncio.ensure_future(self.ws_manager.broadcast(message))
+            )
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    def _finish(self, speech: _Speech):
+        """Release a speak(wait=True) caller"""
+        def resolve():
+            if not speech.done.done():
+                speech.done.set_result(None)
+        try:
+            speech.loop.call_soon_threadsafe(resolve)
+        except RuntimeError:
+            pass
+
     def set_rate(self, rate: int):
         """Set speech rate (words per minute)"""
         self.rate = rate
-        if self.initialized:
-            self.engine.setProperty('rate', rate)
-    
+        self._submit(lambda: self.backend.configure(rate=rate))
+        self._settings_changed()
+
     def set_volume(self, volume: float):
         """Set volume (0.0 to 1.0)"""
         self.volume = max(0.0, min(1.0, volume))
-        if self.initialized:
-            self.engine.setProperty('volume', self.volume)
-    
+        self._submit(lambda: self.backend.configure(volume=self.volume))
+        self._settings_changed()
+
     def set_voice(self, voice_index: int):
         """Set voice by index"""
         self.voice_id = voice_index
-        if self.initialized:
-            voices = self.engine.getProperty('voices')
-            if voice_index < len(voices):
-                self.engine.setProperty('voice', voices[voice_index].id)
-    
+        self._submit(lambda: self.backend.configure(voice_id=voice_index))
+        self._settings_changed()
+
     def list_voices(self) -> list:
         """List available voices"""
         if not self.initialized:
-            self.initialize()
-        
-        if not self.initialized:
-            return []
-        
-        voices = self.engine.getProperty('voices')
-        return [
-            {
-                "id": idx,
-                "name": voice.name,
-                "languages": voice.languages,
-                "gender": voice.gender
-            }
-            for idx, voice in enumerate(voices)
-        ]
-    
+            self.warmup()
+        return self.voices
+
     def stop(self):
         """Stop current speech"""
-        if self.initialized and self.engine:
-            try:
-                self.engine.stop()
-            except:
-                pass
-    
+        self.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Speech queue and time-to-first-audio metrics"""
+        queue_ms = list(self._queue_ms)
+        first_audio_ms = list(self._first_audio_ms)
+        return {
+            "engine": self.backend.name,
+            "speaking": self._current is not None,
+            "queued": self._queue.qsize(),
+            "spoken": self.spoken,
+            "interrupted": self.interrupted,
+            "dropped": self.dropped,
+            "chunks": self.chunks,
+            "queue_ms_mean": round(sum(queue_ms) / len(queue_ms), 1) if queue_ms else 0.0,
+            "queue_ms_p95": round(percentile(queue_ms, 95), 1),
+            "first_audio_ms_mean": round(sum(first_audio_ms) / len(first_audio_ms), 1) if first_audio_ms else 0.0,
+            "first_audio_ms_p95": round(percentile(first_audio_ms, 95), 1),
+            "cache": self.cache.get_stats() if self.cache else None,
+            "remote_audio": self.audio_stream.get_stats() if self.audio_stream else None
+        }
+
     def shutdown(self):
         """Shutdown the TTS engine"""
-        if self.initialized and self.engine:
-            try:
-                self.engine.stop()
-                del self.engine
-            except:
-                pass
-        self.initialized = False
-
+        self.cancel()
+        if self._thread and self._thread.is_alive():
+            self._queue.put((_PRIORITY_CONTROL, next(self._sequence), None))
+            self._thread.join(timeout=2)
@@ -0,0 +1,90 @@
+"""
+Voice Activity Detection (v1.1)
+Cheap energy and zero-crossing gate for int16 audio frames
+"""
+import numpy as np
+from typing import Dict, Any
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def frame_rms(frame: np.ndarray) -> float:
+    """RMS level of an int16 frame, normalized to 0.0 - 1.0"""
+    if len(frame) == 0:
+        return 0.0
+    samples = frame.astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) / 32768.0
+
+
+def frame_zcr(frame: np.ndarray) -> float:
+    """Zero-crossing rate of a frame (crossings per sample)"""
+    if len(frame) < 2:
+        return 0.0
+    signs = np.signbit(frame)
+    return float(np.count_nonzero(signs[1:] != signs[:-1])) / (len(frame) - 1)
+
+
+class EnergyVAD:
+    """Frame-level voice activity gate
+
+    A frame is voiced when its RMS is above ``energy_threshold`` and its
+    zero-crossing rate is below ``max_zcr`` (broadband hiss crosses zero far
+    more often than voiced speech). Voiced decisions are held for
+    ``hangover_frames`` so word endings and short pauses are kept.
+    """
+
+    def __init__(self, energy_threshold: float = 0.01, max_zcr: float = 0.35,
+                 hangover_frames: int = 8):
+        self.energy_threshold = energy_threshold
+        self.max_zcr = max_zcr
+        self.hangover_frames = hangover_frames
+
+        self._hangover = 0
+        self.silent_run = 0  # Consecutive unvoiced frames
+
+        # Statistics
+        self.frames_total = 0
+        self.frames_passed = 0
+        self.frames_skipped = 0
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        """Raw per-frame decision, without hangover"""
+        return frame_rms(frame) >= self.energy_threshold and frame_zcr(frame) <= self.max_zcr
+
+    def process(self, frame: np.ndarray) -> bool:
+        """Gate decision for a frame, including hangover"""
+        self.frames_total += 1
+
+        if self.is_speech(frame):
+            self._hangover = self.hangover_frames
+            self.silent_run = 0
+            voiced = True
+        else:
+            self.silent_run += 1
+            voiced = self._hangover > 0
+            if voiced:
+                self._hangover -= 1
+
+        if voiced:
+            self.frames_passed += 1
+        else:
+            self.frames_skipped += 1
+        return voiced
+
+    def reset(self):
+        """Forget hangover state"""
+        self._hangover = 0
+        self.silent_run = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gate hit/skip counters"""
+        return {
+            "frames_total": self.frames_total,
+            "frames_passed": self.frames_passed,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": round(self.frames_skipped / self.frames_total, 3) if self.frames_total else 0.0,
+            "energy_threshold": self.energy_threshold,
+            "max_zcr": self.max_zcr,
+            "hangover_frames": self.hangover_frames
+        }
@@ -4,14 +4,19 @@ Handles voice command recognition and processing with Whisper
 """
 import asyncio
 import json
+import time
 from pathlib import Path
 from utils.logger import setup_logger
 from core.websocket_manager import ConnectionManager
+from core.audio_capture import AudioBus
 from core.speech_processor import SpeechProcessor
+from core.stt_backend import resolve_decode_profile
+from core.stt_service import STTService
 from core.intent_parser import IntentParser
-from core.tts_engine import TTSEngine
+from core.tts_engine import TTSEngine, PRIORITY_HIGH
 from core.personality import Personality
 from core.skill_manager import SkillManager
+from core.vosk_fast_path import VoskFastPath
 
 logger = setup_logger(__name__)
 
@@ -24,37 +29,119 @@ class VoiceProcessor:
         self.ws_manager = ConnectionManager()
         self.config = config or {}
         
+        # Shared microphone for wake word detection and command recording
+        audio_config = self.config.get("audio", {})
+        self.audio_bus = AudioBus(
+            frame_size=audio_config.get("frame_size"),
+            buffer_seconds=audio_config.get("buffer_seconds"),
+            device_index=audio_config.get("device_index")
+        )
+        
+        # Speech-to-text worker processes (started from the server lifespan)
+        voice_config = self.config.get("voice", {})
+        decode_profile = resolve_decode_profile(voice_config.get("decode_profile", "balanced"),
+                                                voice_config.get("decode_profiles", {}))
+        stt_config = voice_config.get("stt_service", {})
+        batching = voice_config.get("batching", {})
+        cpu_options = voice_config.get("stt_cpu", {})
+        self.stt_service = None
+        if stt_config.get("workers", 0) > 0:
+            self.stt_service = STTService(
+                model_size=voice_config.get("whisper_model", "base"),
+                workers=stt_config.get("workers", 1),
+                queue_size=stt_config.get("queue_size", 8),
+                timeout=stt_config.get("timeout", 15.0),
+                max_audio_seconds=stt_config.get("max_audio_seconds", 30.0),
+                engine=voice_config.get("stt_engine", "whisper"),
+                engine_options=voice_config.get("faster_whisper", {}),
+                threads=decode_profile.get("threads", 0),
+                max_batch_size=batching.get("max_batch_size", 4) if batching.get("enabled", False) else 1,
+                max_wait_ms=batching.get("max_wait_ms", 30) if batching.get("enabled", False) else 0,
+                cpu_options=cpu_options
+            )
+        
         # Initialize v0.2 components
-        self.speech_processor = SpeechProcessor()
+        self.speech_processor = SpeechProcessor(
+            self.audio_bus,
+            model_size=self.config.get("voice", {}).get("whisper_model", "base"),
+            debug_dump_audio=self.config.get("voice", {}).get("debug_dump_audio", False),
+            endpointing=self.config.get("voice", {}).get("endpointing", {}),
+            vad_config=audio_config.get("vad", {}),
+            preprocess=audio_config.get("preprocess", {}),
+            streaming=self.config.get("voice", {}).get("streaming", {}),
+            stt_service=self.stt_service,
+            stt_engine=voice_config.get("stt_engine", "whisper"),
+            engine_options=voice_config.get("faster_whisper", {}),
+            decode_profile=decode_profile,
+            batching=batching,
+            cpu_options=cpu_options
+        )
         self.intent_parser = IntentParser()
         
         # Initialize v0.3 components
-        self.tts_engine = TTSEngine()
+        self.tts_engine = TTSEngine(self.config.get("tts", {}))
         self.personality = Personality(self.config.get("personality", {}))
         
         # Initialize v0.4 components
         self.skill_manager = SkillManager()
         
+        # Two-tier STT: confident Vosk results for known commands skip Whisper (v1.1)
+        fast_path_config = voice_config.get("fast_path", {})
+        self.fast_path = None
+        if fast_path_config.get("enabled", False):
+            self.fast_path = VoskFastPath(
+                self.intent_parser,
+                self.skill_manager,
+                min_confidence=fast_path_config.get("min_confidence", 0.8)
+            )
+            self.speech_processor.fast_path = self.fast_path
+        
         # Settings
         self.recording_duration = self.config.get("voice", {}).get("recording_duration", 5)
         self.voice_enabled = self.config.get("personality", {}).get("voice_enabled", True)
         
-    async def listen_for_command(self):
-        """Listen for a voice command after wake word (v0.2 Enhanced)"""
+    def update_stt_vocabulary(self):
+        """Prompt STT with intent examples and skill triggers (call after skills load)"""
+        if not self.config.get("voice", {}).get("vocabulary_prompt", True):
+            return
+        phrases = self.intent_parser.get_examples() + self.skill_manager.get_triggers()
+        self.speech_processor.set_vocabulary(phrases)
+        
+    async def listen_for_command(self, command_start: int = None):
+        """Listen for a voice command after wake word (v0.2 Enhanced)
+        
+        Args:
+            command_start: Audio bus sample position where the wake word
+                ended. Recording replays from there so words spoken right
+                after the wake word are not lost.
+        """
         try:
+            # A new command makes anything still being said stale (barge-in)
+            self.tts_engine.cancel()
+            
             # Speak wake response (v0.3)
             if self.voice_enabled:
                 wake_response = self.personality.get_wake_response()
                 await self.tts_engine.speak(wake_response, wait=False)
             
             # Notify overlay to show listening state
-            await self.ws_manager.broadcast({
+            listening_message = {
                 "type": "listening_started",
                 "message": "Listening for command..."
-            })
+            }
+            
+            # Latency from the end of the spoken wake word to this point
+            wake_time = self.audio_bus.position_time(command_start) if command_start is not None else None
+            if wake_time is not None:
+                wake_latency_ms = round((time.monotonic() - wake_time) * 1000)
+                listening_message["wake_latency_ms"] = wake_latency_ms
+                logger.info(f"⏱️ Wake-to-listening latency: {wake_latency_ms} ms")
+            
+            await self.ws_manager.broadcast(listening_message)
             
             # Record and transcribe voice command (v0.2)
-            command_text = await self._capture_voice_command()
+            recording = await self._capture_voice_command(command_start)
+            command_text = recording.text if recording else None
             
             if command_text:
                 logger.info(f"📝 Command received: '{command_text}'")
@@ -98,7 +185,9 @@ class VoiceProcessor:
                 await self.ws_manager.broadcast({
                     "type": "command_result",
                     "result": result,
-                    "response": response_text
+                    "response": response_text,
+                    "endpoint": recording.endpoint_info(),
+                    "stt_tier": recording.stt_tier
                 })
             else:
                 logger.warning("No command captured")
@@ -109,7 +198,8 @@ class VoiceProcessor:
                 
                 await self.ws_manager.broadcast({
                     "type": "listening_timeout",
-                    "message": timeout_msg
+                    "message": timeout_msg,
+                    "endpoint": recording.endpoint_info() if recording else None
                 })
                 
         except Exception as e:
@@ -117,22 +207,25 @@ class VoiceProcessor:
             error_msg = self.personality.get_response("error")
             
             if self.voice_enabled:
-                await self.tts_engine.speak(error_msg, wait=False)
+                await self.tts_engine.speak(error_msg, wait=False, priority=PRIORITY_HIGH)
             
             await self.ws_manager.broadcast({
                 "type": "error",
                 "message": str(e)
             })
     
-    async def _capture_voice_command(self):
-        """Capture voice command from microphone using Whisper (v0.2)"""
+    async def _capture_voice_command(self, command_start: int = None):
+        """Capture voice command from microphone using Whisper (v0.2)
+        
+        Returns:
+            Recording with the transcribed text and endpointing details
+        """
         try:
-            # Use speech processor to record and transcribe
-            command_text = await self.speech_processor.record_and_transcribe(
+            # Use speech processor to record (until the speaker stops) and transcribe
+            return await self.speech_processor.capture_command(
+                start_position=command_start,
                 duration=self.recording_duration
             )
-            return command_text
         except Exception as e:
             logger.error(f"Error capturing voice: {e}")
             return None
-
@@ -0,0 +1,116 @@
+"""
+Vosk Fast Path (v1.1)
+First-tier command recognition with Vosk, falling back to Whisper
+"""
+import asyncio
+import json
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Optional, Dict, Any, Tuple
+from utils.logger import setup_logger
+from core.wake_word_detector import load_vosk_model
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+class VoskFastPath:
+    """Decodes a recorded command with Vosk before paying for Whisper
+
+    The Vosk transcript is used when every word is recognized with at least
+    ``min_confidence`` and the text maps to a known intent or skill trigger.
+    Anything else is left to Whisper.
+    """
+
+    def __init__(self, intent_parser, skill_manager, min_confidence: float = 0.8):
+        self.intent_parser = intent_parser
+        self.skill_manager = skill_manager
+        self.min_confidence = min_confidence
+
+        self.recognizer = None
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.attempts = 0
+        self.hits = 0
+        self.low_confidence = 0
+        self.no_match = 0
+        self.vosk_ms_total = 0.0
+        self._whisper_ms = deque(maxlen=50)
+
+    def _decode(self, audio: np.ndarray) -> Tuple[str, float]:
+        """Decode float32 audio, returning the text and lowest word confidence"""
+        with self._lock:
+            if self.recognizer is None:
+                model = load_vosk_model()
+                if model is None:
+                    return "", 0.0
+                from vosk import KaldiRecognizer
+                # Full vocabulary (not the wake grammar), with per-word confidences
+                self.recognizer = KaldiRecognizer(model, SAMPLE_RATE)
+                self.recognizer.SetWords(True)
+
+            pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+            self.recognizer.AcceptWaveform(pcm)
+            result = json.loads(self.recognizer.FinalResult())
+
+        words = result.get("result", [])
+        confidence = min((w.get("conf", 0.0) for w in words), default=0.0)
+        return result.get("text", ""), confidence
+
+    def is_known_command(self, text: str) -> bool:
+        """True if a skill or an intent pattern would handle the text"""
+        if any(skill.metadata.enabled and skill.can_handle(text)
+               for skill in self.skill_manager.skills.values()):
+            return True
+        return self.intent_parser.parse(text)["intent"] != "unknown"
+
+    async def transcribe(self, audio: np.ndarray) -> Optional[str]:
+        """Vosk transcript if it is confident and actionable, else None"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        text, confidence = await loop.run_in_executor(None, self._decode, audio)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.attempts += 1
+        self.vosk_ms_total += elapsed_ms
+
+        if not text or confidence < self.min_confidence:
+            self.low_confidence += 1
+            logger.info(f"⚡ Vosk: '{text}' ({confidence:.2f}) below {self.min_confidence}, using Whisper")
+            return None
+        if not self.is_known_command(text):
+            self.no_match += 1
+            logger.info(f"⚡ Vosk: '{text}' matches no command, using Whisper")
+            return None
+
+        self.hits += 1
+        logger.info(f"⚡ Vosk fast path: '{text}' ({confidence:.2f}) in {elapsed_ms:.0f} ms")
+        return text
+
+    def record_whisper(self, elapsed_ms: float):
+        """Record the post-endpoint latency of a Whisper fallback"""
+        self._whisper_ms.append(elapsed_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tier hit rates and estimated latency saved"""
+        fallbacks = self.attempts - self.hits
+        vosk_ms_mean = self.vosk_ms_total / self.attempts if self.attempts else 0.0
+        whisper_ms_mean = sum(self._whisper_ms) / len(self._whisper_ms) if self._whisper_ms else 0.0
+        # Each hit skips a Whisper decode; every attempt pays for a Vosk decode
+        saved_ms = self.hits * whisper_ms_mean - self.vosk_ms_total if whisper_ms_mean else 0.0
+        return {
+            "attempts": self.attempts,
+            "vosk_hits": self.hits,
+            "whisper_fallbacks": fallbacks,
+            "low_confidence": self.low_confidence,
+            "no_match": self.no_match,
+            "vosk_hit_rate": round(self.hits / self.attempts, 3) if self.attempts else 0.0,
+            "vosk_ms_mean": round(vosk_ms_mean, 1),
+            "whisper_ms_mean": round(whisper_ms_mean, 1),
+            "latency_saved_ms": round(saved_ms),
+            "min_confidence": self.min_confidence
+        }
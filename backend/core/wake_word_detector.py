@@ -4,32 +4,130 @@ Uses Vosk for offline wake word detection
 """
 import asyncio
 import json
-import pyaudio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from vosk import Model, KaldiRecognizer
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Any, List, Tuple
 from utils.logger import setup_logger
 from core.websocket_manager import ConnectionManager
+from core.vad import EnergyVAD
+from core.phrase_matcher import PhraseMatcher, PhraseMatch
+from config import config
 
 logger = setup_logger(__name__)
 
+# Vosk model location - absolute path based on this file's location
+VOSK_MODEL_PATH = Path(__file__).parent.parent / "models" / "vosk-model-small-en-us-0.15"
+
+# One Vosk model per process, shared by wake word spotting and the command fast path
+_vosk_model: Optional[Model] = None
+_vosk_lock = threading.Lock()
+
+
+def load_vosk_model() -> Optional[Model]:
+    """Load the shared Vosk model once (safe to call from several threads)"""
+    global _vosk_model
+    with _vosk_lock:
+        if _vosk_model is None and VOSK_MODEL_PATH.exists():
+            logger.info("📥 Loading Vosk model...")
+            _vosk_model = Model(str(VOSK_MODEL_PATH))
+        return _vosk_model
+
+
+def build_wake_matcher() -> PhraseMatcher:
+    """Compile the configured wake phrases into a matcher
+    
+    Global phrases come from voice.wake_words. voice.wake_phrase_sets maps a
+    tag (e.g. "user:alice" or "room:kitchen") to extra phrases; the tag is
+    reported with each match.
+    """
+    phrases = [(phrase, None) for phrase in config.get("voice.wake_words", WakeWordDetector.WAKE_WORDS)]
+    for tag, tagged_phrases in (config.get("voice.wake_phrase_sets", {}) or {}).items():
+        phrases.extend((phrase, tag) for phrase in tagged_phrases)
+    return PhraseMatcher(phrases)
+
+
+def create_wake_recognizer(model: Model, wake_words: List[str], mode: str = "grammar",
+                           sample_rate: int = 16000, partial_words: bool = False) -> KaldiRecognizer:
+    """Build a Vosk recognizer for wake word spotting
+    
+    "grammar" restricts decoding to the wake phrases plus [unk], which is far
+    cheaper than "full" large-vocabulary decoding. Grammars need a model with
+    a dynamic graph (the small Vosk models have one).
+    """
+    if mode == "grammar":
+        grammar = json.dumps(list(wake_words) + ["[unk]"])
+        recognizer = KaldiRecognizer(model, sample_rate, grammar)
+    else:
+        recognizer = KaldiRecognizer(model, sample_rate)
+    
+    recognizer.SetWords(True)
+    if partial_words:
+        # Word timings on partial results, needed to fire before end of speech
+        recognizer.SetPartialWords(True)
+    return recognizer
+
 
 class WakeWordDetector:
     """Detects wake words from microphone input"""
     
     WAKE_WORDS = ["computer", "hey computer", "nux", "hey nux"]
     SAMPLE_RATE = 16000
-    CHUNK_SIZE = 4096
     
     def __init__(self, voice_processor):
         self.voice_processor = voice_processor
         self.is_listening = False
-        self.audio = None
-        self.stream = None
+        self.audio_bus = voice_processor.audio_bus
+        self.subscription = None
         self.model = None
         self.recognizer = None
+        self.model_manager = None  # ModelManager to reload evicted models on wake, if enabled
+        
+        self.matcher = build_wake_matcher()
+        self.wake_words = self.matcher.phrases()
+        self.mode = config.get("voice.wake_mode", "grammar")
+        self.partial_results = config.get("voice.wake_partial_results", True)
+        
+        # Bus frame index of every frame fed to the recognizer, so Vosk word
+        # timings (seconds of audio fed since creation) map back to the bus
+        self._fed_frames = deque(maxlen=self.audio_bus.ring.capacity)
+        self._fed_count = 0
+        
+        # Voice activity gate in front of the recognizer
+        self.vad = None
+        if config.get("audio.vad.enabled", True):
+            self.vad = EnergyVAD(
+                energy_threshold=config.get("audio.vad.energy_threshold", 0.01),
+                max_zcr=config.get("audio.vad.max_zcr", 0.35),
+                hangover_frames=config.get("audio.vad.hangover_frames", 8)
+            )
+        reset_after_ms = config.get("audio.vad.reset_after_silence_ms", 1500)
+        self.reset_after_frames = max(1, int(reset_after_ms / 1000 * self.SAMPLE_RATE / self.audio_bus.frame_size))
+        self._gate_open = False
+        self._pending_audio = False  # Recognizer has audio since its last reset
+        self.recognizer_resets = 0
+        
         self.ws_manager = ConnectionManager()
         
+        # Kaldi decoding is CPU-bound, keep it on one ordered worker thread
+        self._decoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nuxai-wake")
+    
+    def load_model(self) -> bool:
+        """Load the shared Vosk model (safe to call from several threads)"""
+        self.model = load_vosk_model()
+        return self.model is not None
+    
+    def warmup(self) -> bool:
+        """Load the model and decode a frame of silence to allocate buffers"""
+        if not self.load_model():
+            return False
+        
+        recognizer = create_wake_recognizer(self.model, self.wake_words, self.mode, self.SAMPLE_RATE)
+        recognizer.AcceptWaveform(bytes(self.audio_bus.frame_size * 2))
+        return True
+        
     async def start_listening(self):
         """Start listening for wake words"""
         if self.is_listening:
@@ -39,53 +137,49 @@ class WakeWordDetector:
         try:
             logger.info("🎤 Initializing wake word detector...")
             
-            # Initialize Vosk model - use absolute path based on this file's location
-            import os
-            script_dir = Path(__file__).parent.parent  # Go up to backend directory
-            model_path = script_dir / "models" / "vosk-model-small-en-us-0.15"
+            loop = asyncio.get_running_loop()
             
-            if not model_path.exists():
-                logger.error(f"Vosk model not found at {model_path}")
+            # Load off the event loop; a background warm-up may already have it
+            if not await loop.run_in_executor(None, self.load_model):
+                logger.error(f"Vosk model not found at {VOSK_MODEL_PATH}")
                 logger.info("Please download the model: https://alphacephei.com/vosk/models")
                 # Use a fallback simple wake word detection
                 await self._simple_wake_word_detection()
                 return
                 
-            self.model = Model(str(model_path))
-            self.recognizer = KaldiRecognizer(self.model, self.SAMPLE_RATE)
-            
-            # Initialize PyAudio
-            self.audio = pyaudio.PyAudio()
-            self.stream = self.audio.open(
-                format=pyaudio.paInt16,
-                channels=1,
-                rate=self.SAMPLE_RATE,
-                input=True,
-                frames_per_buffer=self.CHUNK_SIZE
+            self.recognizer = create_wake_recognizer(
+                self.model, self.wake_words, self.mode, self.SAMPLE_RATE,
+                partial_words=self.partial_results
             )
+            logger.info(f"🎯 Wake word recognizer mode: {self.mode}")
+            self._fed_frames.clear()
+            self._fed_count = 0
+            
+            # Capture runs on the shared audio bus thread, we only consume frames here
+            await self.audio_bus.start()
+            self.subscription = self.audio_bus.subscribe("wake_word")
             
             self.is_listening = True
             logger.info("✅ Wake word detector ready! Say 'Computer' or 'Hey Nux' to activate...")
             
             # Listen loop
             while self.is_listening:
-                data = self.stream.read(self.CHUNK_SIZE, exception_on_overflow=False)
+                frame = await self.subscription.read()
+                if frame is None:
+                    break
                 
-                if self.recognizer.AcceptWaveform(data):
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get("text", "").lower()
+                for index, data in self._gate(frame, self.subscription.read_index - 1):
+                    self._fed_frames.append(index)
+                    self._fed_count += 1
                     
-                    if text:
-                        logger.debug(f"Recognized: {text}")
-                        
-                        # Check for wake words
-                        for wake_word in self.WAKE_WORDS:
-                            if wake_word in text:
-                                logger.info(f"🎯 Wake word detected: '{wake_word}'")
-                                await self._handle_wake_word()
-                                break
-                
-                await asyncio.sleep(0.01)
+                    accepted, result = await loop.run_in_executor(
+                        self._decoder,
+                        self._decode_frame,
+                        data
+                    )
+                    
+                    if await self._check_result(accepted, result):
+                        break
                 
         except Exception as e:
             logger.error(f"Error in wake word detection: {e}")
@@ -110,19 +204,130 @@ class WakeWordDetector:
             # For testing without model, we'll auto-trigger every 30 seconds
             # or you can modify to use keyboard input
             
-    async def _handle_wake_word(self):
-        """Handle wake word detection"""
+    def _gate(self, frame, index: int) -> List[Tuple[int, bytes]]:
+        """Decide which frames reach the recognizer
+        
+        Returns (bus index, bytes) pairs to decode. Without a VAD every frame
+        passes. With one, silent frames are skipped; on speech onset the
+        preceding frame is fed too so the first phoneme isn't clipped, and
+        after a long silence the recognizer is reset to drop stale state.
+        """
+        if not self.vad:
+            return [(index, frame.tobytes())]
+        
+        was_voiced = self._gate_open
+        self._gate_open = self.vad.process(frame)
+        
+        if not self._gate_open:
+            if self._pending_audio and self.vad.silent_run >= self.reset_after_frames:
+                self._decoder.submit(self.recognizer.Reset)
+                self._pending_audio = False
+                self.recognizer_resets += 1
+            return []
+        
+        self._pending_audio = True
+        frames = []
+        if not was_voiced:
+            previous = self.audio_bus.ring.get(index - 1)
+            if previous is not None:
+                frames.append((index - 1, previous.tobytes()))
+        frames.append((index, frame.tobytes()))
+        return frames
+    
+    async def _check_result(self, accepted: bool, result: Optional[dict]) -> bool:
+        """Look for a wake word in a recognizer result and handle it
+        
+        Returns True when a wake word fired.
+        """
+        if accepted:
+            text = result.get("text", "").lower()
+            words = result.get("result", [])
+        elif result:
+            text = result.get("partial", "").lower()
+            words = result.get("partial_result", [])
+        else:
+            return False
+        
+        if not text:
+            return False
+        
+        logger.debug(f"Recognized{'' if accepted else ' (partial)'}: {text}")
+        
+        # Check for wake words on token boundaries, aligned with Vosk words
+        tokens = [w.get("word", "") for w in words] if words else text.split()
+        match = self.matcher.find_first(tokens)
+        if not match:
+            return False
+        
+        logger.info(f"🎯 Wake word detected: '{match.phrase}'"
+                    f"{f' [{match.tag}]' if match.tag else ''}"
+                    f"{'' if accepted else ' (partial result)'}")
+        end_time = words[match.end].get("end") if words else None
+        await self._handle_wake_word(self._time_to_position(end_time), match)
+        
+        # Skip audio heard while the command was handled. Reset
+        # also ends the utterance, so a wake word that fired on a
+        # partial result cannot fire again on its final result.
+        self.subscription.seek(self.audio_bus.ring.write_index)
+        self.recognizer.Reset()
+        self._pending_audio = False
+        if self.vad:
+            self.vad.reset()
+            self._gate_open = False
+        return True
+    
+    def _decode_frame(self, data: bytes) -> Tuple[bool, Optional[dict]]:
+        """Feed one frame to the recognizer (runs on the decoder thread)
+        
+        Returns whether Vosk finalized an utterance and the final result, or
+        the partial result when early firing is enabled.
+        """
+        if self.recognizer.AcceptWaveform(data):
+            return True, json.loads(self.recognizer.Result())
+        if self.partial_results:
+            return False, json.loads(self.recognizer.PartialResult())
+        return False, None
+    
+    def _time_to_position(self, end_time: Optional[float]) -> Optional[int]:
+        """Convert a recognizer timestamp to an absolute audio bus sample position"""
+        if end_time is None:
+            return None
+        
+        frame_size = self.audio_bus.frame_size
+        fed_sample = int(round(end_time * self.SAMPLE_RATE))
+        fed_frame, offset = divmod(fed_sample, frame_size)
+        
+        first_fed = self._fed_count - len(self._fed_frames)
+        if fed_frame < first_fed or fed_frame >= self._fed_count:
+            return None
+        
+        return self._fed_frames[fed_frame - first_fed] * frame_size + offset
+    
+    async def _handle_wake_word(self, command_start: Optional[int] = None,
+                                match: Optional[PhraseMatch] = None):
+        """Handle wake word detection
+        
+        Args:
+            command_start: Audio bus sample position where the wake word ended
+            match: The wake phrase that fired
+        """
         try:
+            # Start reloading idle-evicted models while the command is spoken
+            if self.model_manager:
+                self.model_manager.prefetch()
+            
             # Notify overlay via WebSocket
             await self.ws_manager.broadcast({
                 "type": "wake_word_detected",
                 "message": "Wake word detected",
+                "wake_word": match.phrase if match else None,
+                "phrase_set": match.tag if match else None,
                 "timestamp": asyncio.get_event_loop().time()
             })
             
             # Start listening for command
             logger.info("👂 Listening for command...")
-            await self.voice_processor.listen_for_command()
+            await self.voice_processor.listen_for_command(command_start)
             
         except Exception as e:
             logger.error(f"Error handling wake word: {e}")
@@ -132,12 +337,19 @@ class WakeWordDetector:
         logger.info("Stopping wake word detector...")
         self.is_listening = False
         self._cleanup()
+        self._decoder.shutdown(wait=False)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Audio capture and voice activity gate statistics"""
+        stats = self.audio_bus.get_stats()
+        if self.vad:
+            stats["vad"] = self.vad.get_stats()
+            stats["vad"]["recognizer_resets"] = self.recognizer_resets
+        return stats
     
     def _cleanup(self):
         """Clean up audio resources"""
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        if self.audio:
-            self.audio.terminate()
+        if self.subscription:
+            self.subscription.close()
+            self.subscription = None
 
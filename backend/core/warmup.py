@@ -0,0 +1,70 @@
+"""
+Model Warm-up (v1.1)
+Loads models in the background at startup and tracks readiness
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Any, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ModelWarmup:
+    """Runs blocking warm-up functions in parallel and records their state
+
+    Each component moves through pending -> loading -> ready/failed.
+    Warm-up functions run on the default thread pool and return True when
+    the component is usable.
+    """
+
+    def __init__(self):
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self._functions: Dict[str, Callable[[], bool]] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def add(self, name: str, warmup_fn: Callable[[], bool]):
+        """Register a component to warm up"""
+        self._functions[name] = warmup_fn
+        self.components[name] = {"state": "pending", "seconds": None, "error": None}
+
+    def start(self) -> asyncio.Task:
+        """Start warming up all components in the background"""
+        self.task = asyncio.create_task(self.run())
+        return self.task
+
+    async def run(self):
+        """Warm up all components concurrently"""
+        logger.info(f"🔥 Warming up: {', '.join(self._functions)}")
+        await asyncio.gather(*(
+            self._warm(name, warmup_fn) for name, warmup_fn in self._functions.items()
+        ))
+
+    async def _warm(self, name: str, warmup_fn: Callable[[], bool]):
+        """Warm up one component"""
+        component = self.components[name]
+        component["state"] = "loading"
+        start = time.perf_counter()
+
+        try:
+            loop = asyncio.get_running_loop()
+            ready = await loop.run_in_executor(None, warmup_fn)
+            component["state"] = "ready" if ready else "failed"
+        except Exception as e:
+            logger.error(f"Warm-up failed for {name}: {e}")
+            component["state"] = "failed"
+            component["error"] = str(e)
+
+        component["seconds"] = round(time.perf_counter() - start, 2)
+        logger.info(f"🔥 {name}: {component['state']} in {component['seconds']}s")
+
+    def is_ready(self) -> bool:
+        """True once every component finished warming up successfully"""
+        return all(c["state"] == "ready" for c in self.components.values())
+
+    def get_status(self) -> Dict[str, Any]:
+        """Readiness summary for the status endpoint"""
+        return {
+            "ready": self.is_ready(),
+            "components": self.components
+        }
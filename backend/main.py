@@ -18,6 +18,9 @@ from core.llm_processor import LLMProcessor
 from core.platform_manager import PlatformManager
 from core.hotkey_manager import HotkeyManager
 from core.system_tray import SystemTray
+from core.warmup import ModelWarmup
+from core.autotune import ModelAutotuner
+from core.model_manager import ModelManager
 from web_ui.app import router as webui_router
 from config import config
 from utils.logger import setup_logger
@@ -33,6 +36,8 @@ llm_processor = None
 platform_manager = None
 hotkey_manager = None
 system_tray = None
+model_warmup = None
+model_manager = None
 
 
 @asynccontextmanager
@@ -40,6 +45,7 @@ async def lifespan(app: FastAPI):
     """Manage application lifecycle"""
     global wake_word_detector, voice_processor, command_executor
     global context_memory, llm_processor, platform_manager, hotkey_manager, system_tray
+    global model_warmup, model_manager
     
     app_version = config.get("app.version", "1.0.0")
     logger.info(f"🚀 Starting NuxAI Backend v{app_version}...")
@@ -55,6 +61,12 @@ async def lifespan(app: FastAPI):
         context_window_minutes=config.get("context.window_minutes", 30)
     )
     
+    # Pick the largest Whisper model that meets the latency budget (v1.1)
+    if config.get("voice.autotune.enabled", False):
+        autotuner = ModelAutotuner(config.get("voice", {}))
+        model_size = await asyncio.get_running_loop().run_in_executor(None, autotuner.select_model)
+        config.config["voice"]["whisper_model"] = model_size
+    
     voice_processor = VoiceProcessor(command_executor, config.config)
     
     # Load skills (v0.4)
@@ -62,6 +74,9 @@ async def lifespan(app: FastAPI):
         logger.info("🔌 Loading skills...")
         await voice_processor.skill_manager.load_all_skills()
     
+    # Bias speech-to-text toward known commands (v1.1)
+    voice_processor.update_stt_vocabulary()
+    
     # Initialize LLM (v0.5) if enabled
     if config.get("features.llm", False):
         llm_processor = LLMProcessor(config.get("llm.model"))
@@ -72,8 +87,59 @@ async def lifespan(app: FastAPI):
         hotkey_manager = HotkeyManager(config.get("hotkeys.activate", "ctrl+shift+space"))
         hotkey_manager.initialize()
     
+    # Start the Whisper worker pool (v1.1)
+    if voice_processor.stt_service:
+        voice_processor.stt_service.start()
+    app.state.stt_service = voice_processor.stt_service
+    app.state.stt_fast_path = voice_processor.fast_path
+    app.state.stt_batcher = voice_processor.speech_processor.batcher
+    app.state.audio_preprocessor = voice_processor.speech_processor.preprocessor
+    app.state.tts_engine = voice_processor.tts_engine
+    app.state.audio_stream = voice_processor.tts_engine.audio_stream
+    
     # Initialize wake word detector
     wake_word_detector = WakeWordDetector(voice_processor)
+    app.state.wake_word_detector = wake_word_detector
+    
+    # Unload idle models and reload them when a wake word fires (v1.1)
+    model_manager = ModelManager(check_interval=config.get("models.check_interval", 30))
+    idle_seconds = config.get("models.idle_seconds", {}) if config.get("models.idle_unload", False) else {}
+    speech_processor = voice_processor.speech_processor
+    stt_service = voice_processor.stt_service
+    if stt_service:
+        # The worker processes drop and reload their own models on request
+        model_manager.register("whisper", lambda: stt_service.models_loaded,
+                               stt_service.load_models, stt_service.unload_models,
+                               lambda: stt_service.last_used, idle_seconds.get("whisper", 0))
+    else:
+        model_manager.register("whisper", lambda: speech_processor.model_loaded,
+                               speech_processor.preload, speech_processor.unload_model,
+                               lambda: speech_processor.last_used, idle_seconds.get("whisper", 0))
+    # Resident: the wake word recognizer holds a reference and needs it to hear the wake word
+    model_manager.register("vosk", lambda: wake_word_detector.model is not None, wake_word_detector.load_model)
+    if llm_processor and llm_processor.enabled:
+        model_manager.register("llm", lambda: llm_processor.model is not None,
+                               llm_processor.load_model, llm_processor.unload_model,
+                               lambda: llm_processor.last_used, idle_seconds.get("llm", 0))
+    if idle_seconds:
+        model_manager.start()
+        if config.get("models.reload_on_wake", True):
+            wake_word_detector.model_manager = model_manager
+    app.state.model_manager = model_manager
+    
+    # Warm up Whisper, Vosk and TTS in parallel so the first command is fast (v1.1)
+    model_warmup = ModelWarmup()
+    if config.get("voice.warmup", True):
+        model_warmup.add("whisper", voice_processor.speech_processor.warmup)
+        model_warmup.add("vosk", wake_word_detector.warmup)
+        if config.get("personality.voice_enabled", True):
+            model_warmup.add("tts", voice_processor.tts_engine.warmup)
+        model_warmup.start()
+    app.state.model_warmup = model_warmup
+    
+    # Pre-render the personality's fixed responses to the TTS audio cache (v1.1)
+    if config.get("personality.voice_enabled", True):
+        voice_processor.tts_engine.prerender(voice_processor.personality.get_templates())
     
     # Start wake word detection in background
     asyncio.create_task(wake_word_detector.start_listening())
@@ -94,9 +160,14 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("🛑 Shutting down NuxAI Backend...")
+    if model_manager:
+        model_manager.stop()
     if wake_word_detector:
         wake_word_detector.stop_listening()
     if voice_processor:
+        voice_processor.audio_bus.stop()
+        if voice_processor.stt_service:
+            voice_processor.stt_service.stop()
         if voice_processor.tts_engine:
             voice_processor.tts_engine.shutdown()
         if voice_processor.skill_manager:
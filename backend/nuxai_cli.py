@@ -118,6 +118,89 @@ class {name.title()}Skill(Skill):
     print(f"  python nuxai_cli.py --test {name} 'your test command'")
 
 
+def bench_wake(wav_path: str):
+    """Compare full-vocabulary and grammar wake word recognizers"""
+    from core.benchmark import benchmark_wake_word
+    
+    print(f"⏱️  Benchmarking wake word recognizers on {wav_path}\n")
+    results = benchmark_wake_word(wav_path)
+    
+    print(f"{'Mode':<10}{'CPU %':>8}{'Mean ms':>10}{'p95 ms':>10}{'Detections':>12}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['cpu_percent']:>8}{r['frame_latency_ms_mean']:>10}"
+              f"{r['frame_latency_ms_p95']:>10}{r['detections']:>12}")
+    print(f"\nAudio: {results[0]['audio_seconds']}s, CPU % is decode time per second of audio")
+
+
+def bench_stt(sample_dir: str):
+    """Compare speech-to-text engines on recorded commands"""
+    from config import config
+    from core.benchmark import benchmark_stt
+    
+    model_size = config.get("voice.whisper_model", "base")
+    print(f"⏱️  Benchmarking STT engines ({model_size}) on {sample_dir}\n")
+    results = benchmark_stt(sample_dir, model_size=model_size,
+                            engine_options=config.get("voice.faster_whisper", {}))
+    
+    print(f"{'Engine':<16}{'Mean ms':>10}{'p95 ms':>10}{'RTF':>8}{'RSS MB':>9}{'WER':>8}")
+    for r in results:
+        print(f"{r['engine']:<16}{r['latency_ms_mean']:>10}{r['latency_ms_p95']:>10}"
+              f"{r['rtf']:>8}{r['rss_mb']:>9}{r['wer']:>8}")
+    if results:
+        print(f"\nSamples: {results[0]['samples']}, RSS MB is memory added by loading the model")
+
+
+def bench_batch(wav_path: str):
+    """Measure batched Whisper throughput against latency"""
+    from config import config
+    from core.benchmark import benchmark_batching
+    
+    model_size = config.get("voice.whisper_model", "base")
+    print(f"⏱️  Benchmarking Whisper ({model_size}) batch sizes on {wav_path}\n")
+    results = benchmark_batching(wav_path, model_size=model_size)
+    
+    print(f"{'Batch':<8}{'Mean ms':>10}{'p95 ms':>10}{'Utt/s':>9}")
+    for r in results:
+        print(f"{r['batch_size']:<8}{r['batch_ms_mean']:>10}{r['batch_ms_p95']:>10}"
+              f"{r['utterances_per_second']:>9}")
+
+
+def bench_tts():
+    """Compare TTS engines on time to first audio"""
+    from config import config
+    from core.benchmark import benchmark_tts
+    
+    print("⏱️  Benchmarking TTS engines\n")
+    results = benchmark_tts(engine_options={"piper": config.get("tts.piper", {})})
+    
+    print(f"{'Engine':<10}{'Load s':>8}{'First ms':>10}{'p95 ms':>10}{'Synth ms':>10}{'RTF':>8}")
+    for r in results:
+        print(f"{r['engine']:<10}{r['load_seconds']:>8}{r['first_audio_ms_mean']:>10}"
+              f"{r['first_audio_ms_p95']:>10}{r['synth_ms_mean']:>10}{r['rtf']:>8}")
+    print("\nFirst ms is the wait for the first audio chunk of a response")
+
+
+def autotune(sample_dir: str = None):
+    """Benchmark Whisper model sizes and cache the choice for this machine"""
+    from config import config
+    from core.autotune import ModelAutotuner, CACHE_FILE
+    
+    voice_config = dict(config.get("voice", {}))
+    if sample_dir:
+        voice_config["autotune"] = {**voice_config.get("autotune", {}), "sample_dir": sample_dir}
+    
+    tuner = ModelAutotuner(voice_config)
+    print(f"⏱️  Autotuning Whisper model size for a p95 budget of {tuner.budget_ms} ms\n")
+    decision = tuner.run()
+    
+    print(f"{'Model':<10}{'Mean ms':>10}{'p95 ms':>10}{'Fits':>7}")
+    for r in decision["results"]:
+        print(f"{r['model']:<10}{r['latency_ms_mean']:>10}{r['latency_ms_p95']:>10}"
+              f"{'yes' if r['fits_budget'] else 'no':>7}")
+    print(f"\n✅ Selected: {decision['model']} (cached in {CACHE_FILE})")
+    print("Set voice.autotune.enabled to use it at startup")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="NuxAI CLI - Manage your AI assistant",
@@ -129,6 +212,11 @@ Examples:
   nuxai_cli.py --disable weather       Disable weather skill
   nuxai_cli.py --test weather "weather in London"
   nuxai_cli.py --create myskill        Create new skill template
+  nuxai_cli.py --bench-wake sample.wav Compare wake word recognizer modes
+  nuxai_cli.py --bench-stt samples/    Compare speech-to-text engines
+  nuxai_cli.py --bench-batch cmd.wav   Whisper batch throughput vs latency
+  nuxai_cli.py --autotune samples/     Pick the Whisper model for this machine
+  nuxai_cli.py --bench-tts             Compare text-to-speech engines
         """
     )
     
@@ -142,6 +230,17 @@ Examples:
                         help="Test a skill with a command")
     parser.add_argument("--create", metavar="NAME",
                         help="Create a new skill template")
+    parser.add_argument("--bench-wake", metavar="WAV",
+                        help="Benchmark wake word recognizer modes on a 16 kHz mono WAV")
+    parser.add_argument("--bench-stt", metavar="DIR",
+                        help="Benchmark STT engines on DIR/*.wav with matching .txt transcripts")
+    parser.add_argument("--bench-batch", metavar="WAV",
+                        help="Benchmark batched Whisper decoding on a 16 kHz mono WAV")
+    parser.add_argument("--autotune", nargs="?", const="", metavar="DIR",
+                        help="Pick the largest Whisper model within the latency budget "
+                             "(optionally timing DIR/*.wav)")
+    parser.add_argument("--bench-tts", action="store_true",
+                        help="Benchmark TTS engines (pyttsx3 and, if configured, Piper)")
     
     args = parser.parse_args()
     
@@ -155,6 +254,16 @@ Examples:
         asyncio.run(test_skill(args.test[0], args.test[1]))
     elif args.create:
         create_skill(args.create)
+    elif args.bench_wake:
+        bench_wake(args.bench_wake)
+    elif args.bench_stt:
+        bench_stt(args.bench_stt)
+    elif args.bench_batch:
+        bench_batch(args.bench_batch)
+    elif args.autotune is not None:
+        autotune(args.autotune or None)
+    elif args.bench_tts:
+        bench_tts()
     else:
         parser.print_help()
 
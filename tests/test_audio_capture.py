@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+NuxAI Audio Bus Stress Test
+A lagging reader on a tiny ring buffer must never see a spurious end of stream
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from core.audio_capture import AudioBus, _OverflowDetector  # noqa: E402
+
+FRAME_SIZE = 16
+READS = 100000
+FRAME_SECONDS = 1024 / AudioBus.SAMPLE_RATE
+
+
+class FakeStream:
+    """Microphone that returns frames as fast as the capture thread asks"""
+
+    def read(self, frames, exception_on_overflow=True):
+        return b"\x01\x00" * frames
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FastBus(AudioBus):
+    def _open_stream(self):
+        self.stream = FakeStream()
+
+
+async def lagging_reader():
+    # Two-slot ring: the capture thread laps the reader constantly
+    bus = FastBus(frame_size=FRAME_SIZE, buffer_seconds=FRAME_SIZE * 2 / AudioBus.SAMPLE_RATE)
+    await bus.start()
+    subscription = bus.subscribe("stress")
+    ends = 0
+    try:
+        for _ in range(READS):
+            frame = await subscription.read()
+            if frame is None:
+                ends += 1
+            time.sleep(0)  # Let the capture thread run so the reader falls behind
+    finally:
+        bus.stop()
+
+    # Once the bus has stopped, read() does report the end of the stream
+    assert await subscription.read() is None
+    return ends, subscription.dropped_frames
+
+
+def test_lagging_reader_never_ends_early():
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Interleave the two threads as often as possible
+    try:
+        ends, dropped = asyncio.run(lagging_reader())
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    print(f"{READS} reads, {dropped} frames dropped, {ends} spurious end(s) of stream")
+    assert dropped > 0, "reader never fell behind; the test did not exercise the race"
+    assert ends == 0
+
+
+def count_overflows(read_times):
+    detector = _OverflowDetector(FRAME_SECONDS)
+    return sum(detector.frame(now) for now in read_times)
+
+
+def test_overflow_detection():
+    steady = [i * FRAME_SECONDS for i in range(1, 200)]
+    # Reads that come late but are served from the buffer lose no audio
+    jittery = [t + (0.1 if i % 7 == 0 else 0.0) for i, t in enumerate(steady)]
+    # Half a second of input lost after frame 100
+    lost = [t + (0.5 if i >= 100 else 0.0) for i, t in enumerate(steady)]
+    # Sound card clock 0.1 % slower than the system clock
+    drifting = [t * 1.001 for t in steady]
+
+    assert count_overflows(steady) == 0
+    assert count_overflows(jittery) == 0
+    assert count_overflows(lost) == 1
+    assert count_overflows(drifting) == 0
+
+
+if __name__ == "__main__":
+    test_lagging_reader_never_ends_early()
+    test_overflow_detection()
+    print("✅ Audio bus stress test passed")
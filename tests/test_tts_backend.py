@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+NuxAI Piper Backend Test
+A Piper process that never reports the end of an utterance must not hang TTS
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from core.tts_backend import PiperBackend  # noqa: E402
+
+# Writes audio for every line but never logs "Real-time factor"
+QUIET_PIPER = """
+import sys
+for line in sys.stdin:
+    sys.stdout.buffer.write(b"\\x10\\x00" * 2205)
+    sys.stdout.buffer.flush()
+"""
+
+# Reads its input and never answers
+STUCK_PIPER = """
+import sys
+for line in sys.stdin:
+    pass
+"""
+
+
+def fake_piper(directory: str, name: str, source: str) -> str:
+    path = Path(directory) / name
+    path.write_text(f"#!{sys.executable}\n{source}")
+    path.chmod(0o755)
+    return str(path)
+
+
+def synthesize(backend: PiperBackend, text: str):
+    started = time.perf_counter()
+    audio = b"".join(backend.synthesize(text))
+    return audio, time.perf_counter() - started
+
+
+def check_recovers(executable: str, expected_bytes: int):
+    backend = PiperBackend(model="voice.onnx", executable=executable, timeout=0.5)
+    backend.load()
+    try:
+        for text in ("Hello there.", "Still speaking?"):
+            pid = backend.process.pid
+            audio, seconds = synthesize(backend, text)
+            assert len(audio) == expected_bytes, len(audio)
+            assert seconds < 3, f"synthesize() took {seconds:.1f}s"
+            assert backend.process.pid != pid, "Piper was not restarted"
+    finally:
+        backend.close()
+
+
+def test_missing_end_marker():
+    with tempfile.TemporaryDirectory() as directory:
+        check_recovers(fake_piper(directory, "piper-quiet", QUIET_PIPER), 4410)
+
+
+def test_stuck_process():
+    with tempfile.TemporaryDirectory() as directory:
+        check_recovers(fake_piper(directory, "piper-stuck", STUCK_PIPER), 0)
+
+
+if __name__ == "__main__":
+    if os.name == "nt":
+        print("⏭️  Piper backend needs POSIX pipes, skipping")
+        sys.exit(0)
+    test_missing_end_marker()
+    test_stuck_process()
+    print("✅ Piper backend tests passed")